@@ -0,0 +1,16 @@
+import pytest
+from core.cache import private_caches
+from django.core.cache import cache
+from django.test import override_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def private_cache():
+    # Как в QueryLogTestRunner: кэш серверов не трогаем, задачи сразу
+    with private_caches('tests'), override_settings(JOBS_EAGER=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(private_cache):
+    cache.clear()
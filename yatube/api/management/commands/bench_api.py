@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from api.serializers import PostResource
+from posts.benchmarks import measure, percentile, rollback, seed_dataset
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость выдачи постов через values() и через модели'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rollback():
+            seed_dataset(posts=options['posts'], comments=0)
+            resource = PostResource()
+            posts = Post.objects.order_by('-pub_date', '-id')
+            count = posts.count()
+
+            def dump(rows):
+                json.dumps(rows, cls=DjangoJSONEncoder)
+
+            def values():
+                dump([resource.row(row) for row in resource.values(posts)])
+
+            def models():
+                dump([
+                    resource.instance(post)
+                    for post in posts.select_related('author')
+                ])
+
+            for mode, func in (('values', values), ('models', models)):
+                timings = measure(func, options['repeat'])
+                p50 = percentile(timings, 50)
+                self.stdout.write(
+                    f'{mode:>6}: p50 {p50:8.2f} ms, '
+                    f'{count / p50 * 1000:10.0f} rows/s'
+                )
@@ -0,0 +1,113 @@
+from django.core.files.storage import default_storage
+from django.db.models.fields.files import FieldFile
+
+from posts.models import Comment, Follow, Group, Post
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class Resource:
+    """Поля ресурса API: публичное имя и путь к значению в ORM.
+
+    Списки читаются через values() только по запрошенным в ?fields=
+    полям, без создания объектов моделей; одиночные объекты
+    сериализуются по тем же путям через атрибуты. Поля из detail_only
+    есть только у одиночного объекта: их изменения не сбрасывают кэш
+    списков.
+    """
+
+    model = None
+    fields = {}
+    detail_only = ()
+    transforms = {}
+
+    def __init__(self, requested=None, many=False):
+        self.names = [
+            name for name in self.fields
+            if not (many and name in self.detail_only)
+        ]
+        if requested:
+            names = [name.strip() for name in requested.split(',')]
+            unknown = set(names) - set(self.names)
+            if unknown:
+                raise ValueError(
+                    'Неизвестные поля: ' + ', '.join(sorted(unknown))
+                )
+            self.names = names
+
+    def values(self, queryset, ordering=()):
+        lookups = {self.fields[name] for name in self.names}
+        lookups.update(name.lstrip('-') for name in ordering)
+        return queryset.values(*lookups)
+
+    def row(self, values):
+        return {
+            name: self._transform(name, values[self.fields[name]])
+            for name in self.names
+        }
+
+    def instance(self, obj):
+        row = {}
+        for name in self.names:
+            value = obj
+            for attribute in self.fields[name].split('__'):
+                value = (
+                    None if value is None else getattr(value, attribute)
+                )
+            if isinstance(value, FieldFile):
+                value = value.name
+            row[name] = self._transform(name, value)
+        return row
+
+    def _transform(self, name, value):
+        transform = self.transforms.get(name)
+        return transform(value) if transform else value
+
+
+class PostResource(Resource):
+    model = Post
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'pub_date': 'pub_date',
+        'author': 'author__username',
+        'group': 'group_id',
+        'image': 'image',
+        'comments_count': 'comments_count',
+    }
+    # Комментарий сбрасывает только страницы своего поста
+    detail_only = ('comments_count',)
+    transforms = {'image': media_url}
+
+
+class GroupResource(Resource):
+    model = Group
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'slug': 'slug',
+        'description': 'description',
+        'posts_count': 'posts_count',
+    }
+
+
+class CommentResource(Resource):
+    model = Comment
+    fields = {
+        'id': 'id',
+        'post': 'post_id',
+        'author': 'author__username',
+        'text': 'text',
+        'created': 'created',
+    }
+
+
+class FollowResource(Resource):
+    model = Follow
+    fields = {
+        'id': 'id',
+        'user': 'user__username',
+        'following': 'author__username',
+    }
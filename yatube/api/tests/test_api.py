@@ -0,0 +1,218 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='slug-group',
+            description='Описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Текст', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def send(self, client, method, url, data):
+        return getattr(client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_post_list_serializes_requested_fields(self):
+        response = self.guest.get(reverse('api:post_list'))
+        self.assertEqual(response.status_code, 200)
+        [row] = response.json()['results']
+        self.assertEqual(row['id'], self.post.id)
+        self.assertEqual(row['author'], 'shav')
+        self.assertEqual(row['group'], self.group.id)
+        self.assertIsNone(row['image'])
+        response = self.guest.get(
+            reverse('api:post_list'), {'fields': 'id,text'}
+        )
+        self.assertEqual(
+            response.json()['results'], [{'id': self.post.id, 'text': 'Текст'}]
+        )
+        response = self.guest.get(reverse('api:post_list'), {'fields': 'pk'})
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(API_MAX_PAGE_SIZE=2)
+    def test_list_pages_follow_cursor_links(self):
+        for number in range(4):
+            Post.objects.create(text=f'Пост {number}', author=self.author)
+        url = reverse('api:post_list')
+        seen = []
+        with self.assertNumQueries(1):
+            page = self.guest.get(url, {'limit': 50}).json()
+        self.assertIsNone(page['previous'])
+        while True:
+            seen += [row['id'] for row in page['results']]
+            if page['next'] is None:
+                break
+            page = self.guest.get(page['next']).json()
+            self.assertIsNotNone(page['previous'])
+        self.assertEqual(
+            seen,
+            list(Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )),
+        )
+
+    def test_list_filters(self):
+        Post.objects.create(text='Без группы', author=self.reader)
+        url = reverse('api:post_list')
+        for params, count in (
+            ({'group': self.group.slug}, 1),
+            ({'author': 'reader'}, 1),
+            ({}, 2),
+        ):
+            with self.subTest(params=params):
+                results = self.guest.get(url, params).json()['results']
+                self.assertEqual(len(results), count)
+
+    def test_guest_cannot_write(self):
+        response = self.send(
+            self.guest, 'post', reverse('api:post_list'), {'text': 'Пост'}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            self.guest.get(reverse('api:follow_list')).status_code, 401
+        )
+
+    def test_create_and_edit_post(self):
+        response = self.send(
+            self.client, 'post', reverse('api:post_list'),
+            {'text': 'Новый пост', 'group': self.group.id},
+        )
+        self.assertEqual(response.status_code, 201)
+        post = Post.objects.get(id=response.json()['id'])
+        self.assertEqual(post.author, self.author)
+        url = reverse('api:post_detail', args=(post.id,))
+        response = self.send(self.client, 'patch', url, {'text': 'Правка'})
+        self.assertEqual(response.json()['text'], 'Правка')
+        self.assertEqual(response.json()['group'], self.group.id)
+        response = self.send(self.client, 'put', url, {'text': ''})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+
+    def test_only_author_changes_post(self):
+        other = Client()
+        other.force_login(self.reader)
+        url = reverse('api:post_detail', args=(self.post.id,))
+        response = self.send(other, 'patch', url, {'text': 'Чужая правка'})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(other.delete(url).status_code, 403)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.guest.get(url).status_code, 404)
+
+    def test_edit_invalidates_cached_detail(self):
+        url = reverse('api:post_detail', args=(self.post.id,))
+        self.assertEqual(self.guest.get(url).json()['text'], 'Текст')
+        self.send(self.client, 'patch', url, {'text': 'Правка'})
+        self.assertEqual(self.guest.get(url).json()['text'], 'Правка')
+
+    def test_comments(self):
+        url = reverse('api:comment_list', args=(self.post.id,))
+        other = Client()
+        other.force_login(self.reader)
+        response = self.send(other, 'post', url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, 201)
+        comment_id = response.json()['id']
+        [row] = self.guest.get(url).json()['results']
+        self.assertEqual(row['author'], 'reader')
+        detail = reverse(
+            'api:comment_detail', args=(self.post.id, comment_id)
+        )
+        response = self.send(self.client, 'patch', detail, {'text': '!'})
+        self.assertEqual(response.status_code, 403)
+        response = self.send(other, 'patch', detail, {'text': 'Правка'})
+        self.assertEqual(response.json()['text'], 'Правка')
+        self.assertEqual(self.client.delete(detail).status_code, 204)
+        self.assertFalse(Comment.objects.filter(id=comment_id).exists())
+
+    def test_comments_count_only_on_post_detail(self):
+        # Список кэшируется в области 'posts', которую комментарии не
+        # сбрасывают, поэтому счётчик в нём устаревал бы
+        [row] = self.guest.get(reverse('api:post_list')).json()['results']
+        self.assertNotIn('comments_count', row)
+        response = self.guest.get(
+            reverse('api:post_list'), {'fields': 'comments_count'}
+        )
+        self.assertEqual(response.status_code, 400)
+        url = reverse('api:post_detail', args=(self.post.id,))
+        self.assertEqual(self.guest.get(url).json()['comments_count'], 0)
+        Comment.objects.create(post=self.post, author=self.reader, text='!')
+        self.assertEqual(self.guest.get(url).json()['comments_count'], 1)
+
+    def test_groups(self):
+        [row] = self.guest.get(reverse('api:group_list')).json()['results']
+        self.assertEqual(row['slug'], self.group.slug)
+        self.assertEqual(row['posts_count'], 1)
+        response = self.guest.get(
+            reverse('api:group_detail', args=(self.group.slug,))
+        )
+        self.assertEqual(response.json()['title'], self.group.title)
+        response = self.guest.get(reverse('api:group_detail', args=('x',)))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_follow(self):
+        url = reverse('api:follow_list')
+        for username, status in (
+            ('reader', 201), ('reader', 200), ('shav', 400), ('nobody', 400)
+        ):
+            with self.subTest(username=username):
+                response = self.send(
+                    self.client, 'post', url, {'following': username}
+                )
+                self.assertEqual(response.status_code, status)
+        [row] = self.client.get(url).json()['results']
+        self.assertEqual(row, {
+            'id': row['id'], 'user': 'shav', 'following': 'reader'
+        })
+        detail = reverse('api:follow_detail', args=('reader',))
+        self.assertEqual(self.client.delete(detail).status_code, 204)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.client.delete(detail).status_code, 404)
+
+    def test_errors_are_json(self):
+        url = reverse('api:post_list')
+        response = self.client.post(
+            url, '{', content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(response['Allow'], 'GET, POST')
+
+    def test_csrf_failure_is_json(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.author)
+        response = self.send(
+            client, 'post', reverse('api:post_list'), {'text': 'Текст'}
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('CSRF', response.json()['detail'])
+
+    def test_large_lists_are_gzipped(self):
+        for number in range(20):
+            Post.objects.create(text='Длинный текст ' * 20, author=self.author)
+        response = self.guest.get(
+            reverse('api:post_list'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
@@ -0,0 +1,290 @@
+"""JSON API сайта, /api/v1/.
+
+Вход тот же, что на сайте, — сессией Django. Клиент, в том числе
+мобильный, входит формой /auth/login/, хранит куки sessionid и
+csrftoken и в запросах на запись передаёт заголовок X-CSRFToken со
+значением csrftoken. Ошибки, в том числе отказ проверки CSRF,
+приходят JSON-ом вида {"detail": ...}.
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
+from django.shortcuts import get_object_or_404
+from django.views.decorators.gzip import gzip_page
+
+from posts import export as exports
+from posts import thumbnails
+from posts.caching import cached_view
+from posts.forms import CommentForm, PostForm
+from posts.models import Comment, Follow, Group, Post, User
+from posts.utils import CursorPaginator
+
+from .serializers import (CommentResource, FollowResource, GroupResource,
+                          PostResource)
+
+SAFE_METHODS = ('GET', 'HEAD')
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+def error(status, detail, **extra):
+    return JsonResponse({'detail': detail, **extra}, status=status)
+
+
+def parse_body(request):
+    if not request.body or request.method in SAFE_METHODS:
+        return {}
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise ValueError('Тело запроса не JSON')
+    if not isinstance(data, dict):
+        raise ValueError('Ожидается JSON-объект')
+    return data
+
+
+def api_view(*methods, login=False):
+    """Общая обвязка представлений API.
+
+    Проверяет метод, вход пользователя (для записи всегда, для чтения
+    при login=True), разбирает JSON из тела в request.data и отдаёт
+    ошибки JSON-ом, а не HTML-страницами.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = error(405, 'Метод не поддерживается')
+                response['Allow'] = ', '.join(methods)
+                return response
+            needs_login = login or request.method not in SAFE_METHODS
+            if needs_login and not request.user.is_authenticated:
+                return error(401, 'Нужно войти')
+            try:
+                request.data = parse_body(request)
+                return view(request, *args, **kwargs)
+            except Http404:
+                return error(404, 'Не найдено')
+            except ValueError as exception:
+                return error(400, str(exception))
+        return wrapper
+    return decorator
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', settings.API_PAGE_SIZE))
+    except ValueError:
+        size = settings.API_PAGE_SIZE
+    return max(1, min(size, settings.API_MAX_PAGE_SIZE))
+
+
+def list_response(request, resource_class, queryset, ordering):
+    resource = resource_class(request.GET.get('fields'), many=True)
+    paginator = CursorPaginator(
+        resource.values(queryset.order_by(*ordering), ordering),
+        page_size(request),
+        ordering,
+    )
+    page = paginator.get_cursor_page(request.GET.get('cursor'))
+
+    def link(cursor):
+        if cursor is None:
+            return None
+        params = request.GET.copy()
+        params['cursor'] = cursor
+        return request.build_absolute_uri('?' + params.urlencode())
+
+    return JsonResponse({
+        'results': [resource.row(row) for row in page],
+        'next': link(page.next_cursor),
+        'previous': link(page.previous_cursor),
+    })
+
+
+def object_response(request, resource_class, obj, status=200):
+    resource = resource_class(request.GET.get('fields'))
+    return JsonResponse(resource.instance(obj), status=status)
+
+
+def form_errors(form):
+    return error(400, 'Ошибка в данных', errors=form.errors)
+
+
+@gzip_page
+@cached_view('posts')
+@api_view('GET', 'POST')
+def post_list(request):
+    if request.method == 'POST':
+        form = PostForm(request.data)
+        if not form.is_valid():
+            return form_errors(form)
+        post = form.save(commit=False)
+        post.author = request.user
+        post.save()
+        return object_response(request, PostResource, post, status=201)
+    posts = Post.objects.all()
+    if 'group' in request.GET:
+        posts = posts.filter(group__slug=request.GET['group'])
+    if 'author' in request.GET:
+        posts = posts.filter(author__username=request.GET['author'])
+    return list_response(request, PostResource, posts, ('-pub_date', '-id'))
+
+
+@gzip_page
+@cached_view('post:{post_id}')
+@api_view('GET', 'PUT', 'PATCH', 'DELETE')
+def post_detail(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author'), id=post_id
+    )
+    if request.method in SAFE_METHODS:
+        return object_response(request, PostResource, post)
+    if post.author != request.user:
+        return error(403, 'Изменять пост может только автор')
+    if request.method == 'DELETE':
+        post.delete()
+        return HttpResponse(status=204)
+    data = request.data
+    if request.method == 'PATCH':
+        data = {'text': post.text, 'group': post.group_id, **data}
+    form = PostForm(data, instance=post)
+    if not form.is_valid():
+        return form_errors(form)
+    if 'image' in form.changed_data:
+        thumbnails.forget(post)
+    form.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post.id)
+    return object_response(request, PostResource, post)
+
+
+@gzip_page
+@cached_view('posts')
+@api_view('GET')
+def group_list(request):
+    return list_response(
+        request, GroupResource, Group.objects.all(), ('title', 'id')
+    )
+
+
+@gzip_page
+@cached_view('group:{slug}')
+@api_view('GET')
+def group_detail(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return object_response(request, GroupResource, group)
+
+
+@gzip_page
+@cached_view('post:{post_id}')
+@api_view('GET', 'POST')
+def comment_list(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    if request.method == 'POST':
+        form = CommentForm(request.data)
+        if not form.is_valid():
+            return form_errors(form)
+        comment = form.save(commit=False)
+        comment.author = request.user
+        comment.post = post
+        comment.save()
+        return object_response(request, CommentResource, comment, 201)
+    return list_response(
+        request, CommentResource, post.comments.all(), ('created', 'id')
+    )
+
+
+@gzip_page
+@cached_view('post:{post_id}')
+@api_view('GET', 'PUT', 'PATCH', 'DELETE')
+def comment_detail(request, post_id, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.select_related('author', 'post'),
+        id=comment_id,
+        post_id=post_id,
+    )
+    if request.method in SAFE_METHODS:
+        return object_response(request, CommentResource, comment)
+    if request.method == 'DELETE':
+        if request.user not in (comment.author, comment.post.author):
+            return error(403, 'Удалять комментарий может автор или '
+                              'автор поста')
+        comment.delete()
+        return HttpResponse(status=204)
+    if comment.author != request.user:
+        return error(403, 'Изменять комментарий может только автор')
+    form = CommentForm({'text': comment.text, **request.data},
+                       instance=comment)
+    if not form.is_valid():
+        return form_errors(form)
+    form.save()
+    return object_response(request, CommentResource, comment)
+
+
+@gzip_page
+@cached_view('feed:{user.id}')
+@api_view('GET', 'POST', login=True)
+def follow_list(request):
+    if request.method == 'POST':
+        username = request.data.get('following')
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            return error(400, 'Нет такого автора', field='following')
+        if author == request.user:
+            return error(400, 'Нельзя подписаться на себя')
+        follow, created = Follow.objects.get_or_create(
+            user=request.user, author=author
+        )
+        return object_response(
+            request, FollowResource, follow, 201 if created else 200
+        )
+    follows = Follow.objects.filter(user=request.user)
+    if 'search' in request.GET:
+        follows = follows.filter(
+            author__username__icontains=request.GET['search']
+        )
+    return list_response(request, FollowResource, follows, ('-id',))
+
+
+@gzip_page
+@api_view('DELETE')
+def follow_detail(request, username):
+    deleted, _ = Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    if not deleted:
+        raise Http404
+    return HttpResponse(status=204)
+
+
+@api_view('GET', login=True)
+def export(request, kind):
+    """Вся таблица постов или комментариев потоком, только сотрудникам.
+
+    ?format=ndjson|csv, ?gzip=1 отдаёт файл .gz, сжатый на лету.
+    """
+    if not request.user.is_staff:
+        return error(403, 'Выгрузка доступна только сотрудникам')
+    if kind not in exports.EXPORTS:
+        raise Http404
+    format = request.GET.get('format', 'ndjson')
+    if format not in exports.FORMATS:
+        return error(400, 'Формат: ' + ', '.join(exports.FORMATS))
+    compress = request.GET.get('gzip') == '1'
+    filename = f'{kind}.{format}'
+    content_type = EXPORT_CONTENT_TYPES[format]
+    if compress:
+        filename += '.gz'
+        content_type = 'application/gzip'
+    response = StreamingHttpResponse(
+        exports.encode(exports.lines(kind, format), compress),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,168 @@
+import asyncio
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+# Ответ до этого размера собирается в потоке целиком и отправляется
+# циклом событий; больший (выгрузки) уходит клиенту по кускам
+BUFFER_SIZE = 256 * 1024
+
+
+class ASGIHandler:
+    """ASGI-приложение поверх WSGI-обработчика Django.
+
+    В Django 2.2 нет своего ASGI, а ORM синхронный, поэтому представления
+    выполняются в пуле из workers потоков. Цикл событий принимает
+    соединения, дочитывает тело запроса и отправляет ответ, так что
+    медленный клиент держит только сопрограмму, а не поток с
+    соединением к базе.
+    """
+
+    def __init__(self, wsgi, workers):
+        self.wsgi = wsgi
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемое соединение: {scope["type"]}')
+        body = await self.read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        with body:
+            response = await loop.run_in_executor(
+                self.executor, self.run, wsgi_environ(scope, body), loop,
+                send,
+            )
+        if response is not None:
+            start, content = response
+            await send(start)
+            await send({'type': 'http.response.body', 'body': content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        """Тело запроса; большое уходит во временный файл.
+
+        None — клиент отключился, не дослав запрос.
+        """
+        body = tempfile.SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        return body
+
+    def run(self, environ, loop, send):
+        """Выполняет запрос в потоке пула.
+
+        Возвращает начало ответа и тело, если ответ уложился в
+        BUFFER_SIZE; иначе отправляет его сам и возвращает None.
+        """
+        response = {}
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            response['start'] = {
+                'type': 'http.response.start',
+                'status': int(status.split(' ', 1)[0]),
+                'headers': [
+                    (name.lower().encode('latin1'), value.encode('latin1'))
+                    for name, value in headers
+                ],
+            }
+            return chunks.append
+
+        def push(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        streaming = False
+        size = 0
+        result = self.wsgi(environ, start_response)
+        try:
+            for chunk in result:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size < BUFFER_SIZE:
+                    continue
+                if not streaming:
+                    push(response['start'])
+                    streaming = True
+                push({
+                    'type': 'http.response.body',
+                    'body': b''.join(chunks),
+                    'more_body': True,
+                })
+                chunks.clear()
+                size = 0
+        finally:
+            # Django закрывает соединения с базой по сигналу request_finished
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+        if streaming:
+            push({'type': 'http.response.body', 'body': b''.join(chunks)})
+            return None
+        return response['start'], b''.join(chunks)
+
+
+def wsgi_environ(scope, body):
+    """WSGI-окружение запроса из области ASGI."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin1'),
+        'PATH_INFO': scope['path'].encode().decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'REMOTE_ADDR': client[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin1')
+        if name in environ:
+            # Куки по RFC 6265 разделяются «; », а не запятой
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    return environ
+
+
+def get_asgi_application():
+    return ASGIHandler(get_wsgi_application(), settings.ASGI_THREADS)
@@ -0,0 +1,193 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.test import override_settings
+
+from .profiling import record_cache
+
+MISSING = object()
+
+_stores = {}
+_metrics = {}
+_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """Кэш в памяти процесса перед общим кэшем.
+
+    LOCATION — псевдоним общего кэша из CACHES. Ключи с префиксами из
+    LOCAL_PREFIXES дополнительно держатся в памяти процесса до
+    LOCAL_TIMEOUT секунд, не больше LOCAL_MAX_ENTRIES штук, вытесняются
+    давно не читанные. Локально стоит держать только ключи, значение
+    под которыми не меняется, например страницы с номером поколения
+    в ключе: тогда другим процессам нечего сбрасывать.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.local_prefixes = tuple(options.get('LOCAL_PREFIXES', ()))
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 300)
+        with _lock:
+            self._store = _stores.setdefault(location, OrderedDict())
+            self._metrics = _metrics.setdefault(location, {
+                'local': {'hits': 0, 'misses': 0},
+                'shared': {'hits': 0, 'misses': 0},
+            })
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def stats(self):
+        """Попадания и промахи по уровням с запуска процесса."""
+        with _lock:
+            return {
+                tier: dict(counts) for tier, counts in self._metrics.items()
+            }
+
+    def _count(self, tier, hit, number=1):
+        with _lock:
+            self._metrics[tier]['hits' if hit else 'misses'] += number
+
+    def _local(self, key):
+        return key.startswith(self.local_prefixes)
+
+    def _local_get(self, key, version):
+        local_key = self.make_key(key, version)
+        with _lock:
+            entry = self._store.get(local_key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._store.move_to_end(local_key)
+                return pickle.loads(entry[1])
+            self._store.pop(local_key, None)
+        return MISSING
+
+    def _local_set(self, key, value, timeout, version):
+        if timeout == DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        ttl = self.local_timeout
+        if timeout is not None:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            return
+        local_key = self.make_key(key, version)
+        entry = (time.monotonic() + ttl, pickle.dumps(value))
+        with _lock:
+            self._store[local_key] = entry
+            self._store.move_to_end(local_key)
+            while len(self._store) > self.local_max_entries:
+                self._store.popitem(last=False)
+
+    def _local_delete(self, key, version):
+        with _lock:
+            self._store.pop(self.make_key(key, version), None)
+
+    def get(self, key, default=None, version=None):
+        local = self._local(key)
+        if local:
+            value = self._local_get(key, version)
+            self._count('local', value is not MISSING)
+            if value is not MISSING:
+                record_cache(True)
+                return value
+        value = self.shared.get(key, MISSING, version)
+        self._count('shared', value is not MISSING)
+        record_cache(value is not MISSING)
+        if value is MISSING:
+            return default
+        if local:
+            self._local_set(key, value, self.local_timeout, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        rest = []
+        for key in keys:
+            value = MISSING
+            if self._local(key):
+                value = self._local_get(key, version)
+                self._count('local', value is not MISSING)
+            if value is MISSING:
+                rest.append(key)
+            else:
+                found[key] = value
+        if rest:
+            shared = self.shared.get_many(rest, version)
+            self._count('shared', True, len(shared))
+            self._count('shared', False, len(rest) - len(shared))
+            for key, value in shared.items():
+                if self._local(key):
+                    self._local_set(key, value, self.local_timeout, version)
+            found.update(shared)
+        record_cache(True, len(found))
+        record_cache(False, len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version)
+        if self._local(key):
+            self._local_set(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version)
+        if added and self._local(key):
+            self._local_set(key, value, timeout, version)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version)
+        for key, value in data.items():
+            if self._local(key) and key not in failed:
+                self._local_set(key, value, timeout, version)
+        return failed
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(key, version)
+        return self.shared.incr(key, delta, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version)
+
+    def has_key(self, key, version=None):
+        if self._local(key) and (
+            self._local_get(key, version) is not MISSING
+        ):
+            return True
+        return self.shared.has_key(key, version)
+
+    def delete(self, key, version=None):
+        self._local_delete(key, version)
+        self.shared.delete(key, version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local_delete(key, version)
+        self.shared.delete_many(keys, version)
+
+    def clear(self):
+        with _lock:
+            self._store.clear()
+        self.shared.clear()
+
+
+def private_caches(name):
+    """Настройки, в которых общий уровень кэша — память процесса.
+
+    Тесты и замеры очищают кэш на каждом шаге; внутри этих настроек они
+    не трогают кэш, который видят работающие серверы.
+    """
+    return override_settings(CACHES={
+        **settings.CACHES,
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': name,
+        },
+    })
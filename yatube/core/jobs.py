@@ -0,0 +1,129 @@
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import querylog
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_name(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def enqueue(task, *args, key=None, delay=0, max_attempts=None):
+    """Ставит задачу в очередь, когда зафиксируется текущая транзакция.
+
+    task — функция уровня модуля или её путь, args должны сводиться
+    к JSON. Задача с уже известным ключом key второй раз не ставится.
+    При JOBS_EAGER задача выполняется сразу, без очереди.
+    """
+    name = task_name(task)
+    if settings.JOBS_EAGER:
+        with querylog.suspend():
+            import_string(name)(*args)
+        return
+    transaction.on_commit(
+        lambda: add(name, args, key, delay, max_attempts)
+    )
+
+
+def add(name, args=(), key=None, delay=0, max_attempts=None):
+    Job.objects.bulk_create(
+        [
+            Job(
+                name=name,
+                args=json.dumps(list(args)),
+                key=key,
+                max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+                run_at=timezone.now() + timedelta(seconds=delay),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def claimable(now):
+    # Задача, чей обработчик не отчитался за JOBS_LEASE_SECONDS,
+    # считается брошенной и достаётся другому
+    return (
+        Q(status=Job.QUEUED, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+
+
+def claim(worker):
+    """Забирает одну готовую к запуску задачу или возвращает None.
+
+    Задача помечается выполняемой условным UPDATE, поэтому из
+    нескольких обработчиков её получит только один.
+    """
+    now = timezone.now()
+    due = Job.objects.filter(claimable(now)).order_by('run_at')
+    for job_id in due.values_list('id', flat=True)[:10]:
+        taken = Job.objects.filter(claimable(now), id=job_id).update(
+            status=Job.RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.JOBS_LEASE_SECONDS),
+        )
+        if taken:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def backoff(attempts):
+    """Пауза перед повтором: удваивается с каждой попыткой, со сдвигом
+    до 10 %, чтобы повторы упавших вместе задач не шли разом."""
+    delay = min(
+        settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.JOBS_RETRY_MAX_DELAY,
+    )
+    return delay * random.uniform(1, 1.1)
+
+
+def run(job):
+    """Выполняет задачу, при ошибке откладывает повтор или бросает её."""
+    try:
+        import_string(job.name)(*json.loads(job.args))
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error('Задача %s не удалась: %s', job, error)
+            Job.objects.filter(id=job.id).update(
+                status=Job.FAILED, last_error=error, finished=now,
+                locked_until=None,
+            )
+            return False
+        Job.objects.filter(id=job.id).update(
+            status=Job.QUEUED, last_error=error, locked_until=None,
+            run_at=now + timedelta(seconds=backoff(job.attempts)),
+        )
+        return False
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE, finished=timezone.now(), locked_until=None,
+    )
+    return True
+
+
+def purge():
+    """Удаляет выполненные задачи старше JOBS_KEEP_DONE_SECONDS.
+
+    До тех пор их ключи не дают поставить ту же задачу повторно.
+    """
+    border = timezone.now() - timedelta(
+        seconds=settings.JOBS_KEEP_DONE_SECONDS
+    )
+    return Job.objects.filter(status=Job.DONE, finished__lt=border).delete()[0]
@@ -0,0 +1,115 @@
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import apply_pragmas
+
+SCHEMA = (
+    'CREATE TABLE post (id INTEGER PRIMARY KEY, author INTEGER, text TEXT)',
+    'CREATE INDEX post_author ON post (author, id)',
+)
+
+
+def connect(path, mode):
+    db = sqlite3.connect(path)
+    if mode == 'tuned':
+        apply_pragmas(db.cursor(), settings.SQLITE_PRAGMAS)
+    return db
+
+
+def write(db, number):
+    with db:
+        db.execute(
+            'INSERT INTO post (author, text) VALUES (?, ?)',
+            (number % 100, 'Текст поста ' * 20),
+        )
+
+
+def read(db, number):
+    db.execute(
+        'SELECT id, text FROM post WHERE author = ? ORDER BY id DESC LIMIT 10',
+        (number % 100,),
+    ).fetchall()
+
+
+def worker(role, path, mode, start, seconds):
+    """Выполняет запросы seconds секунд с момента start и возвращает
+    число успешных запросов и ошибок блокировки.
+
+    В режиме default соединение открывается на каждый запрос, как при
+    CONN_MAX_AGE = 0, в режиме tuned оно одно и настроено прагмами.
+    """
+    action = write if role == 'writer' else read
+    done = locked = 0
+    db = connect(path, mode)
+    time.sleep(max(0, start - time.time()))
+    while time.time() < start + seconds:
+        if mode == 'default':
+            db.close()
+            db = connect(path, mode)
+        try:
+            action(db, done)
+            done += 1
+        except sqlite3.OperationalError:
+            locked += 1
+    db.close()
+    return role, done, locked
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает временную базу SQLite параллельными писателями и '
+        'читателями с настройками по умолчанию и с SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+
+    def handle(self, *args, **options):
+        for mode in ('default', 'tuned'):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.prepare(path)
+                self.report(mode, self.run(path, mode, options), options)
+
+    @staticmethod
+    def prepare(path):
+        db = sqlite3.connect(path)
+        for statement in SCHEMA:
+            db.execute(statement)
+        with db:
+            for number in range(10000):
+                write(db, number)
+        db.close()
+
+    @staticmethod
+    def run(path, mode, options):
+        roles = (
+            ['writer'] * options['writers'] + ['reader'] * options['readers']
+        )
+        # Процессам нужно время на запуск, отсчёт общий для всех
+        start = time.time() + 1
+        with ProcessPoolExecutor(len(roles)) as pool:
+            futures = [
+                pool.submit(
+                    worker, role, path, mode, start, options['seconds']
+                )
+                for role in roles
+            ]
+            return [future.result() for future in futures]
+
+    def report(self, mode, results, options):
+        for role in ('writer', 'reader'):
+            done = sum(row[1] for row in results if row[0] == role)
+            locked = sum(row[2] for row in results if row[0] == role)
+            self.stdout.write(
+                f'{mode:>7} {role}s: {done / options["seconds"]:10.0f} '
+                f'запросов/с, database is locked: {locked}'
+            )
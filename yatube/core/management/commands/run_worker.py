@@ -0,0 +1,79 @@
+import os
+import signal
+import socket
+from multiprocessing import Event, Process
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+def work(stop, once, poll):
+    """Цикл обработчика: берёт задачи, пока очередь не опустеет, затем
+    ждёт poll секунд; с once по пустой очереди выходит."""
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    done = failed = 0
+    while not stop.is_set():
+        job = jobs.claim(worker)
+        if job is None:
+            if once:
+                break
+            jobs.purge()
+            stop.wait(poll)
+            continue
+        if jobs.run(job):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def child(stop, once, poll):
+    # Прерывание с клавиатуры ловит родитель и останавливает всех через stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    work(stop, once, poll)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи фоновой очереди в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Число процессов; 0 — выполнять в этом процессе',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Пауза в секундах, когда задач нет',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда очередь опустеет',
+        )
+
+    def handle(self, *args, **options):
+        stop = Event()
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        if not options['workers']:
+            done, failed = work(stop, options['once'], options['poll'])
+            self.stdout.write(f'Выполнено: {done}, с ошибкой: {failed}')
+            return
+        # Открытое соединение с базой нельзя делить между процессами
+        connections.close_all()
+        pool = [
+            Process(
+                target=child,
+                args=(stop, options['once'], options['poll']),
+            )
+            for _ in range(options['workers'])
+        ]
+        for process in pool:
+            process.start()
+        try:
+            for process in pool:
+                process.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for process in pool:
+                process.join()
@@ -0,0 +1,33 @@
+from django.conf import settings
+
+from .routers import pinned, wrote
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет пользователя за основной базой после записи.
+
+    Ответ на запрос, который что-то записал, ставит куку на
+    REPLICA_PIN_SECONDS; пока она жива, чтения этого пользователя идут
+    в default.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin = pinned.set(settings.REPLICA_PIN_COOKIE in request.COOKIES)
+        write = wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if wrote.get():
+                response.set_cookie(
+                    settings.REPLICA_PIN_COOKIE,
+                    '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            pinned.reset(pin)
+            wrote.reset(write)
+        return response
@@ -0,0 +1,187 @@
+import random
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Границы корзин гистограмм в секундах, как принято в Prometheus
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, float('inf'))
+
+current = ContextVar('profile', default=None)
+
+
+class Profile:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0
+        self.sql_count = 0
+        self.sql_time = 0
+        self.template_time = 0
+        self.cache = {'hits': 0, 'misses': 0}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - started
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        return ', '.join((
+            f'total;dur={self.total * 1000:.1f}',
+            f'sql;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.sql_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="hits={self.cache["hits"]} '
+            f'misses={self.cache["misses"]}"',
+        ))
+
+
+def record_cache(hit, number=1):
+    profile = current.get()
+    if profile is not None:
+        profile.cache['hits' if hit else 'misses'] += number
+
+
+def instrument_templates():
+    """Добавляет время отрисовки шаблонов к замерам текущего запроса.
+
+    Оборачивается шаблон уровня бэкенда: его вызывают render() и
+    render_to_string(), а вложенные include идут в обход, поэтому
+    время не считается дважды.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'profiled', False):
+        return
+    render = Template.render
+
+    def profiled_render(self, context=None, request=None):
+        profile = current.get()
+        if profile is None:
+            return render(self, context, request)
+        started = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            profile.template_time += time.perf_counter() - started
+
+    profiled_render.profiled = True
+    Template.render = profiled_render
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+
+
+class Metrics:
+    """Сводка по представлениям с запуска процесса."""
+
+    series = (
+        ('request_duration_seconds', 'total'),
+        ('sql_duration_seconds', 'sql_time'),
+        ('template_duration_seconds', 'template_time'),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def observe(self, view, profile):
+        with self.lock:
+            stats = self.views.setdefault(view, {
+                'histograms': {name: Histogram() for name, _ in self.series},
+                'sql_queries': 0,
+                'cache_hits': 0,
+                'cache_misses': 0,
+            })
+            for name, attribute in self.series:
+                stats['histograms'][name].observe(getattr(profile, attribute))
+            stats['sql_queries'] += profile.sql_count
+            stats['cache_hits'] += profile.cache['hits']
+            stats['cache_misses'] += profile.cache['misses']
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+    def render(self):
+        """Текст в формате экспозиции Prometheus."""
+        lines = []
+        with self.lock:
+            views = sorted(self.views.items())
+            for name, _ in self.series:
+                lines.append(f'# TYPE yatube_{name} histogram')
+                for view, stats in views:
+                    histogram = stats['histograms'][name]
+                    for bound, count in zip(BUCKETS, histogram.buckets):
+                        le = '+Inf' if bound == float('inf') else bound
+                        lines.append(
+                            f'yatube_{name}_bucket{{view="{view}",le="{le}"}}'
+                            f' {count}'
+                        )
+                    lines.append(
+                        f'yatube_{name}_sum{{view="{view}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'yatube_{name}_count{{view="{view}"}} '
+                        f'{histogram.count}'
+                    )
+            for name in ('sql_queries', 'cache_hits', 'cache_misses'):
+                lines.append(f'# TYPE yatube_{name}_total counter')
+                for view, stats in views:
+                    lines.append(
+                        f'yatube_{name}_total{{view="{view}"}} {stats[name]}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class ProfilingMiddleware:
+    """Замеряет время запроса, SQL, шаблонов и обращения к кэшу.
+
+    Замеряется доля запросов PROFILING_SAMPLE_RATE. Итог уходит
+    в заголовок Server-Timing и в сводку metrics по представлениям.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+        profile = Profile()
+        token = current.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        profile.finish()
+        match = request.resolver_match
+        metrics.observe(match.view_name if match else 'unresolved', profile)
+        response['Server-Timing'] = profile.server_timing()
+        return response
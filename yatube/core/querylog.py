@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Node
+
+from . import profiling
+
+logger = logging.getLogger(__name__)
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+\b')
+PLACEHOLDERS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+SPACES = re.compile(r'\s+')
+
+# Обёртки запросов, которые не считаются местом вызова
+INSTRUMENTS = {__file__, profiling.__file__}
+
+suspended = ContextVar('suspended', default=False)
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+@contextmanager
+def suspend():
+    """Запросы внутри блока не учитываются, например запросы фоновой
+    задачи, выполненной сразу в обработке запроса (JOBS_EAGER)."""
+    token = suspended.set(True)
+    try:
+        yield
+    finally:
+        suspended.reset(token)
+
+
+def fingerprint(sql):
+    """Форма запроса без значений: одинаковая для запросов, которые
+    отличаются только параметрами и длиной списка в IN."""
+    sql = STRING.sub('?', sql.replace('%s', '?'))
+    sql = NUMBER.sub('?', sql)
+    sql = PLACEHOLDERS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def caller():
+    """Строка шаблона или кода проекта, откуда пришёл запрос."""
+    frame = sys._getframe(2)
+    location = None
+    while frame is not None:
+        node = frame.f_locals.get('self')
+        if isinstance(node, Node) and getattr(node, 'origin', None):
+            name = os.path.relpath(node.origin.name, settings.BASE_DIR)
+            return f'{name}:{node.token.lineno}'
+        filename = frame.f_code.co_filename
+        if (
+            location is None
+            and filename.startswith(settings.BASE_DIR)
+            and filename not in INSTRUMENTS
+        ):
+            name = os.path.relpath(filename, settings.BASE_DIR)
+            location = f'{name}:{frame.f_lineno}'
+        frame = frame.f_back
+    return location
+
+
+class QueryLog:
+    """Следит за запросами к базе внутри блока with.
+
+    Запросы дольше SLOW_QUERY_MS пишутся в журнал с планом выполнения.
+    Формы запросов, повторившиеся N_PLUS_ONE_THRESHOLD раз и больше,
+    по выходу из блока пишутся как N+1 с местом в шаблоне или коде, где
+    сработал порог; при N_PLUS_ONE_RAISE вместо этого NPlusOneError.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.counts = Counter()
+        self.locations = {}
+        self.explaining = False
+        # Запросы страницы с ошибкой не разбираются: отчёт об ошибке
+        # сам повторяет запросы, и N+1 заслонил бы настоящую причину
+        self.failed = False
+        self.stack = ExitStack()
+
+    def __enter__(self):
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stack.close()
+        if exc_type is None and not self.failed:
+            self.report()
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining or suspended.get():
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            shape = fingerprint(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] == settings.N_PLUS_ONE_THRESHOLD:
+                self.locations[shape] = caller()
+            if duration > settings.SLOW_QUERY_MS:
+                self.log_slow(context['connection'], sql, params, duration)
+
+    def explain(self, connection, sql, params):
+        prefix = 'EXPLAIN'
+        if connection.vendor == 'sqlite':
+            prefix = 'EXPLAIN QUERY PLAN'
+        self.explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                return '\n'.join(
+                    ' | '.join(str(value) for value in row)
+                    for row in cursor.fetchall()
+                )
+        finally:
+            self.explaining = False
+
+    def log_slow(self, connection, sql, params, duration):
+        plan = ''
+        if sql.lstrip().upper().startswith('SELECT'):
+            # Запрос уже выполнен успешно, и сбой EXPLAIN не должен
+            # превращать его в ошибку
+            try:
+                plan = self.explain(connection, sql, params)
+            except Exception as error:
+                plan = f'План не получен: {error!r}'
+        logger.warning(
+            'Медленный запрос %.1f ms (%s): %s %r\n%s',
+            duration, self.label, sql, params, plan,
+        )
+
+    def n_plus_one(self):
+        return [
+            (shape, count, self.locations.get(shape))
+            for shape, count in self.counts.items()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        ]
+
+    def report(self):
+        problems = [
+            f'N+1 ({self.label}): {count} x {shape} at {location}'
+            for shape, count, location in self.n_plus_one()
+        ]
+        if problems and settings.N_PLUS_ONE_RAISE:
+            raise NPlusOneError('\n'.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+
+
+class QueryLogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.QUERY_LOG_ENABLED:
+            return self.get_response(request)
+        with QueryLog(f'{request.method} {request.path}') as log:
+            response = self.get_response(request)
+            log.failed = response.status_code >= 500
+        return response
@@ -0,0 +1,52 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+# Сессии читаются в каждом запросе, и от их свежести зависят вход и выход;
+# очередь задач (core) разбирают по только что записанному состоянию
+PRIMARY_APPS = ('sessions', 'core')
+
+pinned = ContextVar('pinned', default=False)
+wrote = ContextVar('wrote', default=False)
+
+
+@contextmanager
+def primary():
+    """Внутри блока все чтения идут в основную базу."""
+    token = pinned.set(True)
+    try:
+        yield
+    finally:
+        pinned.reset(token)
+
+
+class ReplicaRouter:
+    """Чтения уходят на одну из реплик DATABASE_REPLICAS, записи в default.
+
+    Основную базу читают внутри транзакции, после записи в том же
+    запросе и в запросах пользователя, который недавно что-то записал
+    (см. ReplicaPinMiddleware), чтобы он видел свои изменения, даже
+    если реплика отстаёт.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas
+            or model._meta.app_label in PRIMARY_APPS
+            or pinned.get()
+            or wrote.get()
+            or connections['default'].in_atomic_block
+        ):
+            return 'default'
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        wrote.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
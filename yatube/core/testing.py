@@ -0,0 +1,32 @@
+import os
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+from .cache import private_caches
+
+
+class QueryLogTestRunner(DiscoverRunner):
+    """Запускает тесты так, что N+1 в запросе к представлению роняет тест,
+    а задачи фоновой очереди выполняются сразу при постановке.
+
+    Кэш у тестов свой, в памяти процесса. Добавляет вторую базу SQLite
+    replica: тесты, которые её объявили, проверяют на ней маршрутизацию
+    чтений на реплику.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.caches = private_caches('tests')
+        self.caches.enable()
+        settings.QUERY_LOG_ENABLED = True
+        settings.N_PLUS_ONE_RAISE = True
+        settings.JOBS_EAGER = True
+        settings.DATABASES.setdefault('replica', {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(settings.BASE_DIR, 'db.replica.sqlite3'),
+        })
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches.disable()
+        super().teardown_test_environment(**kwargs)
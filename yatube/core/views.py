@@ -1,9 +1,62 @@
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import render
+from django.urls import Resolver404, resolve
+from django.utils.crypto import constant_time_compare
+
+from .profiling import metrics as profiling_metrics
 
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
 
 
+def is_api(request):
+    try:
+        return resolve(request.path_info).namespace == 'api'
+    except Resolver404:
+        return False
+
+
 def csrf_failure(request, reason=''):
-    return render(request, 'core/403csrf.html')
\ No newline at end of file
+    # Клиент API ждёт JSON, а не страницу сайта
+    if is_api(request):
+        return JsonResponse(
+            {'detail': f'Ошибка проверки CSRF: {reason}'}, status=403
+        )
+    return render(request, 'core/403csrf.html')
+
+
+def has_metrics_token(request):
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics(request):
+    """Сводка профилирования и кэша в формате Prometheus.
+
+    Числа накоплены процессом, который ответил на запрос: при нескольких
+    процессах каждый опрос видит только свой. Собирать их нужно с
+    каждого процесса отдельно, например по его собственному порту.
+    """
+    if not (request.user.is_staff or has_metrics_token(request)):
+        raise Http404
+    lines = [
+        f'# Сводка процесса {os.getpid()} с его запуска\n',
+        profiling_metrics.render(),
+    ]
+    if hasattr(cache, 'stats'):
+        lines.append('# TYPE yatube_cache_tier_total counter\n')
+        for tier, counts in cache.stats().items():
+            for result, count in counts.items():
+                lines.append(
+                    f'yatube_cache_tier_total{{tier="{tier}",'
+                    f'result="{result}"}} {count}\n'
+                )
+    return HttpResponse(
+        ''.join(lines), content_type='text/plain; version=0.0.4'
+    )
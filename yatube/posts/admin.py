@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import (Comment, FeedEntry, Follow, Group, Post, Recommendation,
+                     UserCounters)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -26,7 +27,27 @@ class FollowAdmin(admin.ModelAdmin):
     search_fields = ('user', 'author',)
 
 
+class FeedEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'post', 'author', 'pub_date',)
+    list_filter = ('pub_date',)
+
+
+class UserCountersAdmin(admin.ModelAdmin):
+    list_display = (
+        'user', 'posts_count', 'followers_count', 'following_count',
+    )
+    search_fields = ('user__username',)
+
+
+class RecommendationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'rank', 'author', 'score',)
+    search_fields = ('user__username',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
-admin.site.register(Follow, FollowAdmin)
\ No newline at end of file
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(FeedEntry, FeedEntryAdmin)
+admin.site.register(UserCounters, UserCountersAdmin)
+admin.site.register(Recommendation, RecommendationAdmin)
\ No newline at end of file
@@ -0,0 +1,295 @@
+import http.client
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from faker import Faker
+
+from core.cache import private_caches
+
+from . import feed
+from .counters import reconcile
+from .models import Comment, Follow, Group, Post, User
+
+BASELINES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'benchmark_baselines.json'
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rollback():
+    """Всё, что создано внутри блока, откатывается по выходу из него."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+@contextmanager
+def auto_now_add_disabled(model, name):
+    field = model._meta.get_field(name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def seed_posts(count, author, group=None, batch_size=None):
+    now = timezone.now()
+    posts = (
+        Post(
+            text=f'Тестовый пост {i}',
+            author=author,
+            group=group,
+            pub_date=now - timedelta(seconds=i),
+        )
+        for i in range(count)
+    )
+    with auto_now_add_disabled(Post, 'pub_date'):
+        Post.objects.bulk_create(posts, batch_size=batch_size)
+
+
+def measure(func, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def percentile(timings, percent):
+    index = round(percent / 100 * (len(timings) - 1))
+    return sorted(timings)[index]
+
+
+def seed_dataset(users=50, groups=5, posts=5000, comments=500, follows=10,
+                 seed=0):
+    """Синтетические данные для замеров.
+
+    Возвращает читателя, который подписан на follows авторов и оставил
+    комментарий к посту с comments комментариями.
+    """
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    rnd = random.Random(seed)
+    User.objects.bulk_create(
+        User(
+            username=f'bench_{i}',
+            first_name=fake.first_name(),
+            last_name=fake.last_name(),
+        )
+        for i in range(users)
+    )
+    authors = list(User.objects.filter(username__startswith='bench_'))
+    Group.objects.bulk_create(
+        Group(
+            title=fake.sentence(nb_words=3)[:200],
+            slug=f'bench-{i}',
+            description=fake.paragraph(),
+        )
+        for i in range(groups)
+    )
+    group_list = list(Group.objects.filter(slug__startswith='bench-'))
+    now = timezone.now()
+    with auto_now_add_disabled(Post, 'pub_date'):
+        Post.objects.bulk_create(
+            Post(
+                text=fake.paragraph(nb_sentences=3),
+                author=rnd.choice(authors),
+                group=rnd.choice(group_list + [None]),
+                pub_date=now - timedelta(minutes=i),
+            )
+            for i in range(posts)
+        )
+    reader = authors[0]
+    viral = Post.objects.filter(author__in=authors).first()
+    Comment.objects.bulk_create(
+        Comment(post=viral, author=rnd.choice(authors), text=fake.sentence())
+        for _ in range(comments)
+    )
+    Comment.objects.create(post=viral, author=reader, text=fake.sentence())
+    Follow.objects.bulk_create(
+        Follow(user=reader, author=author)
+        for author in rnd.sample(authors[1:], min(follows, users - 1))
+    )
+    reconcile()
+    feed.rebuild()
+    return reader
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def view_cases(reader):
+    post = Post.objects.filter(comments__author=reader).first()
+    comment = post.comments.filter(author=reader).first()
+    author = post.author
+    group = Group.objects.filter(posts_count__gt=0).first()
+    return (
+        ('index', reverse('posts:index')),
+        ('group_posts', reverse('posts:group_posts', args=(group.slug,))),
+        ('profile', reverse('posts:profile', args=(author.username,))),
+        ('post_detail', reverse('posts:post_detail', args=(post.id,))),
+        ('follow_index', reverse('posts:follow_index')),
+        ('comment_edit', reverse('posts:comment_edit', args=(comment.id,))),
+    )
+
+
+def run_views(reader, repeat=5):
+    """Число запросов к базе и задержка каждой страницы без кэша."""
+    client = Client()
+    client.force_login(reader)
+    results = {}
+    with private_caches('benchmarks'):
+        for name, url in view_cases(reader):
+            timings = []
+            for _ in range(repeat):
+                cache.clear()
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, (
+                    name, response.status_code
+                )
+            results[name] = {
+                'queries': counter.count,
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+            }
+    return results
+
+
+def load_paths():
+    """Страницы для нагрузочного теста, по одной каждого вида из базы."""
+    post = Post.objects.select_related('author', 'group').filter(
+        group__isnull=False
+    ).first()
+    if post is None:
+        return [reverse('posts:index')]
+    return [
+        reverse('posts:index'),
+        reverse('posts:group_posts', args=(post.group.slug,)),
+        reverse('posts:profile', args=(post.author.username,)),
+        reverse('posts:post_detail', args=(post.id,)),
+    ]
+
+
+def load(base_url, paths, concurrency=16, requests=1000, uncached=False,
+         timeout=30):
+    """Нагружает запущенный сервер и возвращает пропускную способность
+    и задержки.
+
+    concurrency клиентов в потоках держат по соединению keep-alive и
+    запрашивают paths по кругу, пока не наберётся requests ответов.
+    С uncached к адресу добавляется уникальный параметр, и страницы
+    строятся заново, мимо кэша.
+    """
+    address = urlsplit(base_url)
+    numbers = itertools.count()
+    lock = threading.Lock()
+    timings = []
+    statuses = Counter()
+
+    def client():
+        connection = http.client.HTTPConnection(
+            address.hostname, address.port or 80, timeout=timeout
+        )
+        while True:
+            with lock:
+                number = next(numbers)
+            if number >= requests:
+                break
+            path = address.path.rstrip('/') + paths[number % len(paths)]
+            if uncached:
+                path += f'?load={number}'
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = 'error'
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                timings.append(elapsed)
+                statuses[status] += 1
+        connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(client) for _ in range(concurrency)]
+    elapsed = time.perf_counter() - started
+    # Исключение в клиенте не должно теряться вместе с его замерами
+    for future in futures:
+        future.result()
+    return {
+        'rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'max_ms': round(max(timings), 2),
+        'statuses': dict(statuses),
+    }
+
+
+def load_baselines(path=BASELINES_PATH):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=4, sort_keys=True)
+        file.write('\n')
+
+
+def regressions(results, baselines, threshold=0.25, latency=True):
+    """Страницы, вышедшие за бюджет запросов или порог по задержке."""
+    failures = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        if result['queries'] > baseline['queries']:
+            failures.append(
+                f'{name}: {result["queries"]} запросов, '
+                f'бюджет {baseline["queries"]}'
+            )
+        limit = baseline['p95_ms'] * (1 + threshold)
+        if latency and result['p95_ms'] > limit:
+            failures.append(
+                f'{name}: p95 {result["p95_ms"]} ms, '
+                f'допустимо {limit:.2f} ms'
+            )
+    return failures
@@ -0,0 +1,121 @@
+import hashlib
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core.routers import primary
+
+GENERATION_KEY = 'generation:{}'
+
+
+def generations(scopes):
+    """Текущие поколения областей кэша.
+
+    Пропавшее поколение заводится заново от текущего времени, чтобы
+    не совпасть с номером, под которым страницы уже лежат в кэше.
+    """
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump(*scopes):
+    # Поколение — время изменения, по нему видно, успели ли реплики
+    # получить данные для новой версии страницы
+    cache.set_many(
+        {GENERATION_KEY.format(scope): time.time_ns() for scope in scopes},
+        None,
+    )
+
+
+def forget(scopes):
+    cache.delete_many([GENERATION_KEY.format(scope) for scope in scopes])
+
+
+def page_key(request, view_name, versions):
+    user = request.user
+    viewer = 'anon'
+    if user.is_authenticated:
+        viewer = f'{user.id}:{request.META.get("CSRF_COOKIE", "")}'
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    versions = '.'.join(str(value) for value in versions)
+    return f'page:{view_name}:{viewer}:{versions}:{path}'
+
+
+def recent(versions):
+    """Изменялась ли какая-то из областей последние REPLICA_PIN_SECONDS."""
+    return time.time_ns() - max(versions) < settings.REPLICA_PIN_SECONDS * 1e9
+
+
+def cacheable(request, response):
+    # Страница с только что выданным CSRF-токеном не подойдёт тем, у кого
+    # этого токена в куках нет
+    new_csrf_token = (
+        request.META.get('CSRF_COOKIE_USED')
+        and settings.CSRF_COOKIE_NAME not in request.COOKIES
+    )
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and not new_csrf_token
+    )
+
+
+def cached_view(*scopes):
+    """Кэширует страницу до изменения любой из перечисленных областей.
+
+    Области записываются шаблонами строк, которые заполняются
+    аргументами представления и текущим пользователем, например
+    'group:{slug}' или 'feed:{user.id}', либо функциями от запроса
+    и тех же аргументов.
+
+    Поколения областей служат и валидаторами условного GET: ETag —
+    хэш ключа страницы, Last-Modified — время последнего изменения.
+    Повторный запрос без изменений получает 304, не трогая ни базу,
+    ни шаблоны. Сверяется только ETag: Last-Modified точен до секунды
+    и не отличит версии, изменённые в одну секунду.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            names = [
+                scope(request, **kwargs) if callable(scope)
+                else scope.format(user=request.user, **kwargs)
+                for scope in scopes
+            ]
+            versions = generations(names)
+            key = page_key(request, view.__name__, versions)
+            etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+            last_modified = max(versions) // 10 ** 9
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                return response
+            response = cache.get(key)
+            if response is None:
+                # Свежую версию страницы читаем из основной базы, иначе
+                # в кэш может попасть ответ отставшей реплики
+                reads = primary() if recent(versions) else nullcontext()
+                with reads:
+                    response = view(request, *args, **kwargs)
+                if not cacheable(request, response):
+                    return response
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            # Страница своя у каждого пользователя, и браузер должен
+            # сверять её при каждом показе, а не угадывать срок свежести
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,103 @@
+from django.db import IntegrityError, transaction
+from django.db.models import (Count, F, IntegerField, OuterRef, Q, Subquery,
+                              Sum)
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+RECONCILE_BATCH_SIZE = 500
+
+
+def bump(model, pk, field, delta):
+    if pk is None:
+        return
+    rows = model.objects.filter(pk=pk)
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    rows.update(**{field: F(field) + delta})
+
+
+def user_counters(user_id):
+    """Счётчики пользователя; недостающая строка создаётся по факту."""
+    try:
+        return UserCounters.objects.get(user_id=user_id)
+    except UserCounters.DoesNotExist:
+        pass
+    try:
+        with transaction.atomic():
+            return UserCounters.objects.create(
+                user_id=user_id,
+                posts_count=Post.objects.filter(author_id=user_id).count(),
+                followers_count=Follow.objects.filter(
+                    author_id=user_id
+                ).count(),
+                following_count=Follow.objects.filter(
+                    user_id=user_id
+                ).count(),
+            )
+    except IntegrityError:
+        return UserCounters.objects.get(user_id=user_id)
+
+
+def counters_of(user):
+    """Счётчики пользователя, загруженного с select_related('counters')."""
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return user_counters(user.id)
+
+
+def posts_total():
+    """Число всех постов — сумма счётчиков авторов, без COUNT(*) по постам."""
+    return UserCounters.objects.aggregate(
+        total=Coalesce(Sum('posts_count'), 0)
+    )['total']
+
+
+def _count(model, field):
+    rows = (
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(rows, output_field=IntegerField()), 0)
+
+
+def reconcile():
+    """Пересчитывает все счётчики, возвращает число исправленных строк."""
+    missing = User.objects.filter(counters__isnull=True).values_list(
+        'pk', flat=True
+    )
+    created = UserCounters.objects.bulk_create(
+        (UserCounters(user_id=pk) for pk in missing),
+        ignore_conflicts=True,
+    )
+    targets = (
+        (Group, {'posts_count': _count(Post, 'group')}),
+        (Post, {'comments_count': _count(Comment, 'post')}),
+        (
+            UserCounters,
+            {
+                'posts_count': _count(Post, 'author'),
+                'followers_count': _count(Follow, 'author'),
+                'following_count': _count(Follow, 'user'),
+            },
+        ),
+    )
+    fixed = len(created)
+    for model, counters in targets:
+        actual = {f'actual_{name}': value for name, value in counters.items()}
+        differs = Q()
+        for name in counters:
+            differs |= ~Q(**{name: F(f'actual_{name}')})
+        ids = list(
+            model.objects.annotate(**actual)
+            .filter(differs)
+            .values_list('pk', flat=True)
+        )
+        for start in range(0, len(ids), RECONCILE_BATCH_SIZE):
+            batch = ids[start:start + RECONCILE_BATCH_SIZE]
+            fixed += model.objects.filter(pk__in=batch).update(**counters)
+    return fixed
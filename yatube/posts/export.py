@@ -0,0 +1,95 @@
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Post
+
+# Выгружаемые поля: имя в файле и путь в ORM
+EXPORTS = {
+    'posts': (Post, (
+        ('id', 'id'),
+        ('text', 'text'),
+        ('pub_date', 'pub_date'),
+        ('author', 'author__username'),
+        ('group', 'group__slug'),
+        ('image', 'image'),
+    )),
+    'comments': (Comment, (
+        ('id', 'id'),
+        ('post', 'post_id'),
+        ('author', 'author__username'),
+        ('text', 'text'),
+        ('created', 'created'),
+    )),
+}
+FORMATS = ('ndjson', 'csv')
+CHUNK_SIZE = 2000
+
+
+def rows(kind, chunk_size=CHUNK_SIZE):
+    """Строки таблицы кортежами, кусками по chunk_size по возрастанию id.
+
+    Каждый кусок — отдельный запрос id > последнего, поэтому память не
+    растёт с размером таблицы, а запрос не держит чтение открытым всю
+    выгрузку.
+    """
+    model, fields = EXPORTS[kind]
+    lookups = [lookup for _, lookup in fields]
+    last_id = 0
+    while True:
+        chunk = model.objects.filter(id__gt=last_id).order_by('id')
+        count = 0
+        for row in chunk.values_list(*lookups)[:chunk_size].iterator(
+            chunk_size=chunk_size
+        ):
+            count += 1
+            last_id = row[0]
+            yield row
+        if count < chunk_size:
+            return
+
+
+class Echo:
+    """Файл для csv.writer, который просто возвращает записанное."""
+
+    def write(self, value):
+        return value
+
+
+def lines(kind, format='ndjson', chunk_size=CHUNK_SIZE):
+    """Выгрузка строками текста в формате NDJSON или CSV с заголовком."""
+    names = [name for name, _ in EXPORTS[kind][1]]
+    if format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(names)
+        for row in rows(kind, chunk_size):
+            yield writer.writerow(row)
+        return
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows(kind, chunk_size):
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def encode(chunks, compress=False, buffer_size=64 * 1024):
+    """Байты выгрузки, по желанию сжатые gzip на лету.
+
+    Мелкие строки склеиваются в куски около buffer_size, чтобы не
+    отдавать клиенту и сжатию по строке за раз.
+    """
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode()
+        buffer.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            data = b''.join(buffer)
+            buffer, size = [], 0
+            yield compressor.compress(data) if compress else data
+    data = b''.join(buffer)
+    if compress:
+        yield compressor.compress(data) + compressor.flush()
+    elif data:
+        yield data
@@ -0,0 +1,174 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import caching
+from .models import FeedEntry, Follow, Post, UserCounters
+
+
+def hot_authors(author_ids):
+    """Авторы, чьи посты не раскладываются по лентам подписчиков."""
+    return set(
+        UserCounters.objects.filter(
+            user_id__in=author_ids,
+            followers_count__gt=settings.FEED_FANOUT_LIMIT,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def followers(author_id):
+    """Подписчики автора или None, если их больше FEED_FANOUT_LIMIT."""
+    follower_ids = list(
+        Follow.objects.filter(author_id=author_id).values_list(
+            'user_id', flat=True
+        )[:settings.FEED_FANOUT_LIMIT + 1]
+    )
+    if len(follower_ids) > settings.FEED_FANOUT_LIMIT:
+        return None
+    return follower_ids
+
+
+def fan_out(post, follower_ids):
+    if follower_ids is None:
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                post_id=post.id,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in follower_ids
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def forget_feeds(follower_ids):
+    if follower_ids is None:
+        caching.bump('feed:hot')
+    else:
+        caching.forget(f'feed:{user_id}' for user_id in follower_ids)
+
+
+def invalidate(author_id):
+    """Задача очереди: сбрасывает кэш лент подписчиков автора."""
+    forget_feeds(followers(author_id))
+
+
+def fan_out_post(post_id):
+    """Задача очереди: раскладывает новый пост по лентам подписчиков
+    и сбрасывает кэш их лент."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return
+    follower_ids = followers(post.author_id)
+    fan_out(post, follower_ids)
+    forget_feeds(follower_ids)
+
+
+def fill(user_ids, author_id):
+    """Раскладывает последние FEED_BACKFILL_LENGTH постов автора
+    по лентам пользователей user_ids."""
+    posts = list(
+        Post.objects.filter(author_id=author_id).values_list(
+            'id', 'pub_date'
+        )[:settings.FEED_BACKFILL_LENGTH]
+    )
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+            for user_id in user_ids
+            for post_id, pub_date in posts
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def backfill(user_id, author_id):
+    if hot_authors((author_id,)):
+        return
+    fill((user_id,), author_id)
+
+
+def cool_down(author_id):
+    """Задача очереди: раскладывает посты автора, у которого подписчиков
+    снова не больше FEED_FANOUT_LIMIT, по лентам всех подписчиков.
+
+    Пока автор был «горячим», его посты в ленты не попадали и читались
+    из Post; без этого они пропали бы из лент.
+    """
+    follower_ids = followers(author_id)
+    if follower_ids is None:
+        return
+    fill(follower_ids, author_id)
+    forget_feeds(follower_ids)
+
+
+def drop(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def feed_queryset(user):
+    """Лента подписок пользователя.
+
+    Обычно это диапазон по индексу (user, -pub_date) в FeedEntry. Если
+    пользователь подписан на авторов с числом подписчиков больше
+    FEED_FANOUT_LIMIT, их посты дочитываются из Post при запросе.
+    """
+    followed = Follow.objects.filter(user=user).values_list(
+        'author_id', flat=True
+    )
+    hot = hot_authors(followed)
+    if not hot:
+        return FeedEntry.objects.select_related(
+            'post__author', 'post__group'
+        ).filter(user=user)
+    entries = FeedEntry.objects.filter(user=user).values('post_id')
+    return Post.objects.select_related('author', 'group').filter(
+        Q(id__in=entries) | Q(author_id__in=hot)
+    )
+
+
+def feed_posts(object_list):
+    return [
+        item.post if isinstance(item, FeedEntry) else item
+        for item in object_list
+    ]
+
+
+def refill(pairs=(), author_ids=()):
+    """Раскладывает посты по лентам после вставки в обход сигналов.
+
+    pairs — новые подписки (читатель, автор), author_ids — авторы новых
+    постов, которые получают все их подписчики. Посты «горячих» авторов,
+    как и в backfill, не раскладываются. Запросов — по два на автора.
+    """
+    readers = defaultdict(set)
+    for user_id, author_id in pairs:
+        readers[author_id].add(user_id)
+    for author_id in author_ids:
+        readers[author_id].update(followers(author_id) or ())
+    hot = set(
+        UserCounters.objects.filter(
+            followers_count__gt=settings.FEED_FANOUT_LIMIT
+        ).values_list('user_id', flat=True)
+    )
+    for author_id, user_ids in readers.items():
+        if author_id not in hot:
+            fill(user_ids, author_id)
+
+
+def rebuild():
+    """Заново раскладывает посты по лентам всех подписчиков."""
+    with transaction.atomic():
+        FeedEntry.objects.all().delete()
+        refill(Follow.objects.values_list('user_id', 'author_id').iterator())
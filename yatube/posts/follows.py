@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from core.routers import primary
+
+from .models import Follow
+
+FOLLOWED_KEY = 'follows:{}'
+
+
+def followed_ids(user):
+    """Id авторов, на которых подписан пользователь.
+
+    Множество лежит в кэше до новой подписки или отписки, а в пределах
+    запроса — на самом объекте пользователя, как _perm_cache у прав,
+    поэтому состояние подписок целой страницы стоит не больше одного
+    запроса к базе.
+
+    Множество читается из основной базы: снимок с отстающей реплики
+    пролежал бы в кэше до следующей подписки.
+    """
+    if not user.is_authenticated:
+        return frozenset()
+    ids = getattr(user, '_follow_cache', None)
+    if ids is None:
+        key = FOLLOWED_KEY.format(user.id)
+        ids = cache.get(key)
+        if ids is None:
+            with primary():
+                ids = frozenset(
+                    Follow.objects.filter(user_id=user.id).values_list(
+                        'author_id', flat=True
+                    )
+                )
+            cache.set(key, ids, settings.FOLLOWS_CACHE_TIMEOUT)
+        user._follow_cache = ids
+    return ids
+
+
+def is_following(user, author_ids):
+    """Подписан ли пользователь на каждого из авторов: id → bool."""
+    ids = followed_ids(user)
+    return {author_id: author_id in ids for author_id in author_ids}
+
+
+def forget(user):
+    try:
+        del user._follow_cache
+    except AttributeError:
+        pass
+    cache.delete(FOLLOWED_KEY.format(user.id))
@@ -0,0 +1,294 @@
+import csv
+import gzip
+import io
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from . import feed
+from .counters import reconcile
+from .models import (Comment, Follow, Group, Post, StaleRecommendations,
+                     User)
+from .search import get_backend
+
+FORMATS = ('ndjson', 'csv')
+CHUNK_SIZE = 20000
+# Типы полей, значения которых нужно переводить в формат базы; остальные
+# (строки, числа, id связей) драйвер принимает как есть
+PREPARED_TYPES = ('DateField', 'TimeField', 'DecimalField')
+
+
+@contextmanager
+def indexes_deferred(*models):
+    """Снимает неуникальные индексы таблиц на время блока и строит заново.
+
+    Вставка без них идёт быстрее, а построить индекс по готовой таблице
+    дешевле, чем поддерживать его на каждой строке. Определения берутся
+    из sqlite_master, поэтому снимаются и индексы внешних ключей; на
+    других базах блок ничего не меняет.
+
+    Блок отдаёт команды CREATE INDEX IF NOT EXISTS для снятых индексов:
+    если процесс прервут, их можно выполнить вручную и повторно.
+    """
+    if connection.vendor != 'sqlite':
+        yield []
+        return
+    tables = [model._meta.db_table for model in models]
+    placeholders = ', '.join(['%s'] * len(tables))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index'"
+            " AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%'"
+            f' AND tbl_name IN ({placeholders})',
+            tables,
+        )
+        indexes = cursor.fetchall()
+        statements = [
+            sql.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1)
+            for _, sql in indexes
+        ]
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    try:
+        yield statements
+    finally:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def read(file, format='ndjson'):
+    """Строки файла словарями; пустые строки NDJSON пропускаются."""
+    if format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+def open_file(path):
+    """Текстовый файл выгрузки, .gz распаковывается на лету."""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return io.open(path, encoding='utf-8', newline='')
+
+
+def guess_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'csv' if name.endswith('.csv') else 'ndjson'
+
+
+def moment(value):
+    """Дата из ISO 8601, как её пишет выгрузка; пустая — текущий момент."""
+    if not value:
+        return timezone.now()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'Не дата: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def preparer(field):
+    """Перевод значения поля в формат базы или None, если не нужен."""
+    kind = field.get_internal_type()
+    if kind == 'DateTimeField':
+        # Даты уже разобраны в moment(), остаётся привести их к UTC
+        return connection.ops.adapt_datetimefield_value
+    if kind in PREPARED_TYPES:
+        return partial(field.get_db_prep_save, connection=connection)
+    return None
+
+
+def insert(model, chunk):
+    """Вставляет словари attname → значение одной транзакцией.
+
+    Поля, которых нет в словаре, получают значения по умолчанию.
+    Первичный ключ пишется, только если он задан хоть у одной строки:
+    для остальных SQLite выдаст его сам.
+    """
+    if not chunk:
+        return 0
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+        or any(values.get(field.attname) for values in chunk)
+    ]
+    columns = [
+        (field.attname, field.get_default(), preparer(field))
+        for field in fields
+    ]
+    params = [
+        [
+            prepare(values.get(name, default)) if prepare
+            else values.get(name, default)
+            for name, default, prepare in columns
+        ]
+        for values in chunk
+    ]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column)
+                  for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+    return len(chunk)
+
+
+class Importer:
+    """Массовая загрузка пользователей, групп, постов, комментариев и
+    подписок из строк выгрузки (формат posts.export).
+
+    Строки собираются в значения столбцов и вставляются одним
+    подготовленным INSERT через executemany, каждые chunk_size строк —
+    в своей транзакции. Авторы и группы ищутся по словарям имя → id,
+    которые читаются из базы один раз. Счётчики, ленты, поисковый индекс
+    и кэш страниц пересчитываются одним разом в finish(): сигналы при
+    такой вставке не срабатывают.
+    """
+
+    # Порядок важен: посты ссылаются на авторов и группы
+    models = {
+        'users': User,
+        'groups': Group,
+        'posts': Post,
+        'comments': Comment,
+        'follows': Follow,
+    }
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.maps = {}
+        self.imported = dict.fromkeys(self.models, 0)
+        # Что нужно разложить по лентам в finish()
+        self.follows = []
+        self.post_authors = set()
+        # Один хэш на всех: пароль без входа, как set_unusable_password()
+        self.password = make_password(None)
+
+    def lookup(self, model, field, value, line):
+        if model not in self.maps:
+            self.maps[model] = dict(model.objects.values_list(field, 'id'))
+        try:
+            return self.maps[model][value]
+        except KeyError:
+            raise ValueError(
+                f'Строка {line}: нет {model._meta.model_name} {value!r}'
+            )
+
+    def user(self, row, line):
+        return {
+            'username': row['username'],
+            'first_name': row.get('first_name', ''),
+            'last_name': row.get('last_name', ''),
+            'email': row.get('email', ''),
+            'password': self.password,
+        }
+
+    def group(self, row, line):
+        return {
+            'title': row['title'],
+            'slug': row['slug'],
+            'description': row.get('description', ''),
+        }
+
+    def post(self, row, line):
+        group = row.get('group')
+        return {
+            'id': row.get('id') or None,
+            'text': row['text'],
+            'pub_date': moment(row.get('pub_date')),
+            'author_id': self.lookup(User, 'username', row['author'], line),
+            'group_id': (
+                self.lookup(Group, 'slug', group, line) if group else None
+            ),
+            'image': row.get('image') or '',
+        }
+
+    def comment(self, row, line):
+        return {
+            'id': row.get('id') or None,
+            'post_id': int(row['post']),
+            'author_id': self.lookup(User, 'username', row['author'], line),
+            'text': row['text'],
+            'created': moment(row.get('created')),
+        }
+
+    def follow(self, row, line):
+        return {
+            'user_id': self.lookup(User, 'username', row['user'], line),
+            'author_id': self.lookup(
+                User, 'username', row['following'], line
+            ),
+        }
+
+    def load(self, kind, rows):
+        """Загружает строки одного вида, возвращает их число и время."""
+        model = self.models[kind]
+        build = getattr(self, kind[:-1])
+        started = time.perf_counter()
+        count = 0
+        chunk = []
+        for line, row in enumerate(rows, 1):
+            chunk.append(build(row, line))
+            if len(chunk) == self.chunk_size:
+                count += self.insert(kind, chunk, count)
+                chunk = []
+        count += self.insert(kind, chunk, count)
+        # Новые пользователи и группы нужны следующим видам строк
+        self.maps.pop(model, None)
+        self.imported[kind] += count
+        return count, time.perf_counter() - started
+
+    def insert(self, kind, chunk, done):
+        """Вставляет часть строк; done — сколько уже загружено раньше."""
+        try:
+            count = insert(self.models[kind], chunk)
+        except IntegrityError as error:
+            self.imported[kind] += done
+            raise ValueError(
+                f'строки {done + 1}-{done + len(chunk)} не загружены '
+                f'({error}); загружено раньше: {done}'
+            )
+        if kind == 'posts':
+            self.post_authors.update(row['author_id'] for row in chunk)
+        elif kind == 'follows':
+            self.follows.extend(
+                (row['user_id'], row['author_id']) for row in chunk
+            )
+        return count
+
+    def finish(self):
+        """Пересчитывает то, что при обычном сохранении делают сигналы.
+
+        Ленты дополняются одной транзакцией и только тем, что принесла
+        загрузка: постами авторов по новым подпискам и новыми постами.
+        Подписчики из загрузки отмечаются к пересчёту рекомендаций.
+        """
+        reconcile()
+        with transaction.atomic():
+            feed.refill(self.follows, self.post_authors)
+            # Их рекомендации пересчитает build_recommendations
+            StaleRecommendations.objects.bulk_create(
+                (
+                    StaleRecommendations(user_id=user_id)
+                    for user_id in {user_id for user_id, _ in self.follows}
+                ),
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+        if self.imported['posts']:
+            get_backend().rebuild()
+        cache.clear()
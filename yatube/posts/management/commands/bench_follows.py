@@ -0,0 +1,88 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from core.cache import private_caches
+from posts.benchmarks import percentile, rollback
+from posts.models import Follow, User, UserCounters
+from posts.utils import CursorPaginator
+from yatube.settings import FOLLOWS_LENGTH
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет первую и последнюю страницу подписчиков у авторов '
+        'с разным числом подписчиков'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--followers', type=int, nargs='+',
+            default=[1000, 10000, 100000],
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        # Кэш очищается перед каждым замером, поэтому он свой, не общий
+        with rollback(), private_caches('benchmarks'):
+            User.objects.bulk_create(
+                User(username=f'bench_follower_{number}')
+                for number in range(max(options['followers']))
+            )
+            user_ids = list(
+                User.objects.filter(
+                    username__startswith='bench_follower_'
+                ).values_list('id', flat=True)
+            )
+            for count in sorted(options['followers']):
+                author = self.seed(user_ids[:count])
+                for page, cursor in self.pages(author, count):
+                    timings = self.measure(
+                        author, cursor, options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{count:>7} подписчиков, {page:>9}: '
+                        f'p50 {percentile(timings, 50):8.2f} ms, '
+                        f'p95 {percentile(timings, 95):8.2f} ms'
+                    )
+
+    @staticmethod
+    def seed(user_ids):
+        author = User.objects.create(
+            username=f'bench_author_{len(user_ids)}'
+        )
+        Follow.objects.bulk_create(
+            Follow(user_id=user_id, author=author) for user_id in user_ids
+        )
+        UserCounters.objects.filter(user=author).update(
+            followers_count=len(user_ids)
+        )
+        return author
+
+    @staticmethod
+    def pages(author, count):
+        yield 'первая', None
+        if count > FOLLOWS_LENGTH:
+            follows = Follow.objects.filter(author=author).order_by('-id')
+            last = follows[count - FOLLOWS_LENGTH - 1]
+            cursor = CursorPaginator(
+                follows, FOLLOWS_LENGTH, ordering=('-id',)
+            ).encode_cursor(last, 'next')
+            yield 'последняя', cursor
+
+    @staticmethod
+    def measure(author, cursor, repeat):
+        client = Client()
+        url = reverse('posts:followers', args=(author.username,))
+        params = {'cursor': cursor} if cursor else {}
+        timings = []
+        for _ in range(repeat):
+            cache.clear()
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.status_code
+        return timings
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from posts.benchmarks import load, load_paths
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает запущенные серверы параллельными клиентами и сравнивает '
+        'запросы в секунду и хвосты задержки, например WSGI '
+        '(gunicorn yatube.wsgi) и ASGI (uvicorn yatube.asgi:application)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'urls', nargs='+', metavar='URL',
+            help='Адреса серверов, например http://127.0.0.1:8000',
+        )
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help='Страница для запросов; по умолчанию по одной каждого вида',
+        )
+        parser.add_argument(
+            '--uncached', action='store_true',
+            help='Строить каждую страницу заново, мимо кэша страниц',
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or load_paths()
+        for url in options['urls']:
+            # Прогрев: первые запросы импортируют модули и открывают
+            # соединения с базой
+            load(url, paths, concurrency=1, requests=len(paths))
+            result = load(
+                url, paths, options['concurrency'], options['requests'],
+                options['uncached'],
+            )
+            self.stdout.write(
+                f'{url}: {result["rps"]:8.1f} запросов/с, '
+                f'p50 {result["p50_ms"]:8.2f} ms, '
+                f'p95 {result["p95_ms"]:8.2f} ms, '
+                f'p99 {result["p99_ms"]:8.2f} ms, '
+                f'max {result["max_ms"]:8.2f} ms, '
+                f'ответы {result["statuses"]}'
+            )
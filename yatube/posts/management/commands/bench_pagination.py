@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+
+from posts.benchmarks import measure, percentile, rollback, seed_posts
+from posts.models import Post, User
+from posts.utils import CursorPaginator
+from yatube.settings import CUT_LENGTH as CL
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает OFFSET и keyset пагинацию на первой и дальней странице'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--page', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rollback():
+            author = User.objects.create(username='bench_pagination')
+            seed_posts(options['posts'], author)
+            posts = Post.objects.filter(author=author)
+            for page in (1, options['page']):
+                self.report(posts, page, options['repeat'])
+
+    def report(self, posts, page, repeat):
+        def offset():
+            list(Paginator(posts, CL).get_page(page).object_list)
+
+        paginator = CursorPaginator(posts, CL)
+        cursor = None
+        if page > 1:
+            last = posts.order_by(*paginator.ordering)[(page - 1) * CL - 1]
+            cursor = paginator.encode_cursor(last, 'next')
+
+        def keyset():
+            paginator.get_cursor_page(cursor)
+
+        for mode, func in (('offset', offset), ('cursor', keyset)):
+            timings = measure(func, repeat)
+            self.stdout.write(
+                f'{mode:>6} page {page:>6}: '
+                f'p50 {percentile(timings, 50):8.2f} ms, '
+                f'p95 {percentile(timings, 95):8.2f} ms'
+            )
@@ -0,0 +1,53 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.benchmarks import measure, percentile, rollback, seed_dataset
+from posts.models import Post
+from posts.search import WORD, FTSBackend, LikeBackend
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает поиск по индексу FTS5 с поиском через LIKE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--queries', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rollback():
+            seed_dataset(posts=options['posts'], comments=0, follows=0)
+            fts = FTSBackend()
+            started = time.perf_counter()
+            count = fts.rebuild()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'Индекс: {count} постов за {elapsed:.2f} s, '
+                f'{count / elapsed:.0f} постов/с'
+            )
+            for query in self.queries(options['queries']):
+                for name, backend in (('fts', fts), ('like', LikeBackend())):
+                    timings = measure(
+                        lambda: list(backend.page(query)), options['repeat']
+                    )
+                    self.stdout.write(
+                        f'{name:>4} {query!r:>24}: '
+                        f'p50 {percentile(timings, 50):8.2f} ms, '
+                        f'p95 {percentile(timings, 95):8.2f} ms'
+                    )
+
+    @staticmethod
+    def queries(count):
+        rnd = random.Random(0)
+        texts = Post.objects.values_list('text', flat=True)[:200]
+        words = sorted({
+            word.lower()
+            for text in texts
+            for word in WORD.findall(text)
+            if len(word) > 4
+        })
+        singles = rnd.sample(words, count)
+        # Слова нет ни в одном посте: LIKE дочитывает таблицу до конца
+        return singles + [' '.join(rnd.sample(words, 2)), 'абракадабра']
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmarks import (load_baselines, regressions, rollback,
+                              run_views, save_baselines, seed_dataset)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет число запросов и задержку страниц posts на синтетических '
+        'данных и сравнивает с сохранёнными базовыми значениями'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--posts', type=int, default=50000)
+        parser.add_argument('--comments', type=int, default=2000)
+        parser.add_argument('--follows', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--threshold', type=float, default=0.25)
+        parser.add_argument(
+            '--update-baselines',
+            action='store_true',
+            help='Записать результаты как новые базовые значения',
+        )
+
+    def handle(self, *args, **options):
+        with rollback():
+            reader = seed_dataset(
+                users=options['users'],
+                posts=options['posts'],
+                comments=options['comments'],
+                follows=options['follows'],
+            )
+            results = run_views(reader, options['repeat'])
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:>14}: {result["queries"]:>3} запросов, '
+                f'p50 {result["p50_ms"]:8.2f} ms, '
+                f'p95 {result["p95_ms"]:8.2f} ms'
+            )
+        if options['update_baselines']:
+            save_baselines(results)
+            self.stdout.write('Базовые значения обновлены')
+            return
+        failures = regressions(
+            results, load_baselines(), options['threshold']
+        )
+        if failures:
+            raise CommandError('\n'.join(failures))
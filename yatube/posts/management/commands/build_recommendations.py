@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации подписок пользователям, чьи подписки '
+        'менялись, или с --full всем'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать всем, например после массовой загрузки',
+        )
+        parser.add_argument(
+            '--limit', type=int,
+            help='Сколько авторов хранить на пользователя',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        users, rows = recommendations.build(
+            options['full'], options['limit']
+        )
+        engine = 'numpy' if recommendations.numpy else 'python'
+        self.stdout.write(
+            f'Пользователей: {users}, рекомендаций: {rows} '
+            f'за {time.perf_counter() - started:.2f} s ({engine})'
+        )
@@ -0,0 +1,64 @@
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import (CHUNK_SIZE, FORMATS, Importer, guess_format,
+                            indexes_deferred, open_file, read)
+
+
+class Command(BaseCommand):
+    help = (
+        'Массово загружает пользователей, группы, посты, комментарии '
+        'и подписки из NDJSON или CSV (можно .gz)'
+    )
+
+    def add_arguments(self, parser):
+        for kind in Importer.models:
+            parser.add_argument(f'--{kind}', metavar='PATH')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='По умолчанию по расширению файла')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help='Строк в одной транзакции')
+        parser.add_argument('--defer-indexes', action='store_true',
+                            help='Строить индексы таблиц после загрузки')
+
+    def handle(self, *args, **options):
+        files = [
+            (kind, options[kind]) for kind in Importer.models
+            if options[kind]
+        ]
+        if not files:
+            raise CommandError('Не указано ни одного файла')
+        importer = Importer(options['chunk_size'])
+        deferred = (
+            indexes_deferred(*(Importer.models[kind] for kind, _ in files))
+            if options['defer_indexes']
+            else nullcontext([])
+        )
+        try:
+            with deferred as statements:
+                if statements:
+                    self.stdout.write(
+                        'Индексы сняты; если загрузка прервётся, '
+                        'выполните:\n' + ';\n'.join(statements) + ';'
+                    )
+                for kind, path in files:
+                    self.load(importer, kind, path, options['format'])
+        finally:
+            # Загруженное до ошибки тоже должно попасть в ленты и счётчики
+            importer.finish()
+
+    def load(self, importer, kind, path, format):
+        with open_file(path) as file:
+            try:
+                count, seconds = importer.load(
+                    kind, read(file, format or guess_format(path))
+                )
+            except KeyError as error:
+                raise CommandError(f'{kind}: в строке нет поля {error}')
+            except ValueError as error:
+                raise CommandError(f'{kind}: {error}')
+        self.stdout.write(
+            f'{kind}: {count} строк за {seconds:.2f} с, '
+            f'{count / max(seconds, 1e-9):.0f} строк/с'
+        )
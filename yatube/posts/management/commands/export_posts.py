@@ -0,0 +1,52 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from posts.export import CHUNK_SIZE, EXPORTS, FORMATS, encode, lines
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты или комментарии в NDJSON или CSV потоком, '
+        'не загружая таблицу в память'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', nargs='?', default='posts',
+                            choices=sorted(EXPORTS))
+        parser.add_argument('--format', default='ndjson', choices=FORMATS)
+        parser.add_argument('--output', default='-',
+                            help='Файл выгрузки, по умолчанию stdout')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        output = options['output']
+        target = (
+            nullcontext(sys.stdout.buffer) if output == '-'
+            else open(output, 'wb')
+        )
+        count = 0
+
+        def counted(chunks):
+            nonlocal count
+            for chunk in chunks:
+                count += 1
+                yield chunk
+
+        with target as file:
+            for data in encode(
+                counted(lines(options['kind'], options['format'],
+                              options['chunk_size'])),
+                compress=options['gzip'],
+            ):
+                file.write(data)
+        if options['format'] == 'csv':
+            count -= 1
+        self.stderr.write(
+            f'Выгружено строк: {count} '
+            f'за {time.perf_counter() - started:.1f} с'
+        )
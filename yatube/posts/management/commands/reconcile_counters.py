@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Сверяет денормализованные счётчики с таблицами и исправляет их'
+
+    def handle(self, *args, **options):
+        fixed = reconcile()
+        self.stdout.write(f'Исправлено строк со счётчиками: {fixed}')
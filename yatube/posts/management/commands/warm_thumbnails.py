@@ -0,0 +1,131 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+
+CHECKPOINT_PATH = os.path.join(settings.BASE_DIR, '.warm_thumbnails.json')
+
+
+def init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def warm(post_id, rebuild):
+    from posts import thumbnails
+    try:
+        thumbnails.build(post_id, rebuild)
+    except Exception as error:
+        return post_id, repr(error)
+    return post_id, None
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит миниатюры всех картинок постов в пуле процессов; '
+        'прерванный прогон продолжается с сохранённой точки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help='Только посты, опубликованные начиная с даты ГГГГ-ММ-ДД',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Число процессов; 0 - строить в текущем процессе',
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Начать с начала, не глядя на сохранённую точку',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Пересоздать миниатюры, даже если sorl считает их готовыми',
+        )
+
+    def resume_from(self, checkpoint, run_options):
+        """id, после которого продолжать, или 0.
+
+        Точка, сохранённая прогоном с другими --since и --rebuild,
+        относится к другому набору постов и не используется.
+        """
+        if not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint, encoding='utf-8') as file:
+            saved = json.load(file)
+        saved_options = {
+            'since': saved.get('since'),
+            'rebuild': saved.get('rebuild', False),
+        }
+        if saved_options != run_options:
+            self.stdout.write(
+                'Сохранённая точка от прогона с другими параметрами, '
+                'начинаем с начала'
+            )
+            return 0
+        return saved['last_id']
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        run_options = {
+            'since': options['since'] and options['since'].isoformat(),
+            'rebuild': options['rebuild'],
+        }
+        last_id = 0
+        if not options['restart']:
+            last_id = self.resume_from(checkpoint, run_options)
+        posts = Post.objects.exclude(image='').order_by('id')
+        if options['since']:
+            posts = posts.filter(pub_date__date__gte=options['since'])
+        ids = list(posts.filter(id__gt=last_id).values_list('id', flat=True))
+        self.stdout.write(f'Постов с картинками к обработке: {len(ids)}')
+        pool = None
+        if options['workers']:
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                options['workers'], initializer=init_worker
+            )
+        run = pool.map if pool else map
+        done, failures = 0, []
+        started = time.perf_counter()
+        try:
+            for start in range(0, len(ids), options['batch_size']):
+                batch = ids[start:start + options['batch_size']]
+                rebuild = [options['rebuild']] * len(batch)
+                for post_id, error in run(warm, batch, rebuild):
+                    done += 1
+                    if error:
+                        failures.append(post_id)
+                        self.stderr.write(f'Пост {post_id}: {error}')
+                with open(checkpoint, 'w', encoding='utf-8') as file:
+                    json.dump({'last_id': batch[-1], **run_options}, file)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{done}/{len(ids)}, {done / elapsed:.1f} постов/с, '
+                    f'ошибок: {len(failures)}'
+                )
+        finally:
+            if pool:
+                pool.shutdown()
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(
+            f'Готово: {done} постов, ошибок: {len(failures)}'
+            + (f' ({", ".join(map(str, failures))})' if failures else '')
+        )
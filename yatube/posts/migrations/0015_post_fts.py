@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Индекс создаётся пустым: тексты в нём приводятся к основам
+    # стеммером из posts.search, и миграция не должна зависеть от его
+    # текущей версии. Заполняет индекс команда rebuild_search_index.
+
+    dependencies = [
+        ('posts', '0014_post_thumbnail_variants'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+            "text, tokenize='unicode61 remove_diacritics 2')",
+            'DROP TABLE posts_post_fts',
+        ),
+    ]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def queue_thumbnails(apps, schema_editor):
+    """Ставит в очередь миниатюры постов, загруженных до их появления.
+
+    Пока миниатюры нет, в списках отдаётся исходная картинка целиком.
+    Задачи выполнит обработчик run_worker.
+    """
+    Job = apps.get_model('core', 'Job')
+    Post = apps.get_model('posts', 'Post')
+    post_ids = Post.objects.exclude(image='').filter(
+        thumbnail=''
+    ).values_list('id', flat=True)
+    Job.objects.bulk_create(
+        (
+            Job(
+                name='posts.thumbnails.build',
+                args=f'[{post_id}]',
+                key=f'thumbnail:{post_id}',
+                max_attempts=settings.JOBS_MAX_ATTEMPTS,
+            )
+            for post_id in post_ids.iterator()
+        ),
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0016_recommendation'),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_thumbnails, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,11 @@ class Group(models.Model):
     title = models.CharField('Наименование группы', max_length=200,)
     slug = models.SlugField('Ссылка на группу', unique=True,)
     description = models.TextField('Описание группы')
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name_plural = 'Группы'
@@ -45,14 +50,67 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    thumbnail = models.ImageField(
+        'Миниатюра',
+        blank=True,
+        editable=False,
+        width_field='thumbnail_width',
+        height_field='thumbnail_height',
+    )
+    thumbnail_width = models.PositiveIntegerField(
+        'Ширина миниатюры',
+        null=True,
+        editable=False,
+    )
+    thumbnail_height = models.PositiveIntegerField(
+        'Высота миниатюры',
+        null=True,
+        editable=False,
+    )
+    thumbnail_variants = models.TextField(
+        'Копии миниатюры',
+        blank=True,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name_plural = 'Публикации'
+        indexes = (
+            models.Index(
+                fields=('pub_date', 'id'),
+                name='post_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date', 'id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', 'pub_date', 'id'),
+                name='post_group_pub_date_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def thumbnail_srcset(self):
+        """srcset из копий миниатюры, записанных строками «имя ширина»."""
+        storage = self.thumbnail.storage
+        lines = self.thumbnail_variants.splitlines()
+        variants = (line.rpartition(' ') for line in lines)
+        return ', '.join(
+            f'{storage.url(name)} {width}w'
+            for name, _, width in variants
+            if name and width.isdigit()
+        )
+
 class Comment(models.Model):
     post = models.ForeignKey(
         Post,
@@ -78,8 +136,14 @@ class Comment(models.Model):
     )
     
     class Meta:
-        ordering = ('post',)
+        ordering = ('created',)
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created'),
+                name='comment_post_created_idx',
+            ),
+        )
         
     def __str__(self):
         return self.text[:15]
@@ -101,6 +165,134 @@ class Follow(models.Model):
     class Meta:
         ordering = ('author',)
         verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+        )
 
     def __str__(self):
         return f'{self.author}<-{self.user}'
+
+
+class UserCounters(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        'Количество подписок',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Публикация',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор публикации',
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name_plural = 'Ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_feed_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', 'pub_date', 'id'),
+                name='feed_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='feed_user_author_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
+
+
+class Recommendation(models.Model):
+    """Автор, на которого стоит подписаться, по данным графа подписок.
+
+    Таблицу строит manage.py build_recommendations, читают её только
+    по пользователю в порядке rank.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Читатель',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.PositiveIntegerField('Общих подписок')
+
+    class Meta:
+        ordering = ('user', 'rank')
+        verbose_name_plural = 'Рекомендации подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'rank'),
+                name='unique_recommendation_rank',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class StaleRecommendations(models.Model):
+    """Пользователь, чьи подписки менялись после расчёта рекомендаций.
+
+    Id без внешнего ключа: отметку ставят и подписки, которые удаляются
+    вместе с самим пользователем.
+    """
+
+    user_id = models.IntegerField('Пользователь', primary_key=True)
+
+    class Meta:
+        verbose_name_plural = 'Устаревшие рекомендации'
+
+    def __str__(self):
+        return str(self.user_id)
@@ -0,0 +1,23 @@
+from django.core.mail import send_mail
+from django.urls import reverse
+
+from .models import Comment
+
+
+def comment_email(comment_id):
+    """Задача очереди: пишет автору поста о новом комментарии."""
+    comment = Comment.objects.select_related(
+        'author', 'post__author'
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return
+    recipient = comment.post.author
+    if not recipient.email or recipient == comment.author:
+        return
+    send_mail(
+        f'Новый комментарий от {comment.author.username}',
+        f'{comment.text}\n\n'
+        f'{reverse("posts:post_detail", args=(comment.post_id,))}',
+        None,
+        [recipient.email],
+    )
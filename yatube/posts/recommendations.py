@@ -0,0 +1,191 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import caching
+from .importer import insert
+from .models import Follow, Recommendation, StaleRecommendations
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Столько id помещается в один IN (...) даже у старых сборок SQLite
+USERS_PER_TRANSACTION = 500
+
+
+class Graph:
+    """Граф подписок в памяти: кто на кого подписан.
+
+    Кандидаты для пользователя — авторы, на которых подписаны его
+    авторы (друзья друзей). Счёт кандидата — число таких путей к нему,
+    при равенстве выше тот, у кого больше подписчиков, затем меньший
+    id. Авторы, на которых пользователь уже подписан, и он сам
+    отбрасываются.
+    """
+
+    def __init__(self, edges):
+        self.following = defaultdict(list)
+        self.popularity = Counter()
+        for user_id, author_id in edges:
+            self.following[user_id].append(author_id)
+            self.popularity[author_id] += 1
+
+    def users(self):
+        return list(self.following)
+
+    def suggest(self, user_id, limit):
+        """Лучшие limit кандидатов списком пар (id автора, счёт)."""
+        followed = self.following.get(user_id, ())
+        scores = Counter()
+        for author_id in followed:
+            scores.update(self.following.get(author_id, ()))
+        for author_id in followed:
+            scores.pop(author_id, None)
+        scores.pop(user_id, None)
+        return heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda item: (-item[1], -self.popularity[item[0]], item[0]),
+        )
+
+
+class NumpyGraph(Graph):
+    """Тот же граф в массивах NumPy, как матрица смежности в CSR.
+
+    Авторы всех подписок пользователя лежат подряд в authors с
+    offsets[user] по offsets[user + 1]. Кандидаты пользователя
+    собираются одной выборкой по индексам без цикла по его авторам,
+    а считаются и сортируются средствами NumPy.
+    """
+
+    def __init__(self, edges):
+        edges = numpy.array(edges, dtype=numpy.int64).reshape(-1, 2)
+        edges = edges[numpy.lexsort((edges[:, 1], edges[:, 0]))]
+        size = int(edges.max()) + 2 if len(edges) else 1
+        self.authors = edges[:, 1]
+        self.offsets = numpy.zeros(size + 1, dtype=numpy.int64)
+        numpy.cumsum(
+            numpy.bincount(edges[:, 0], minlength=size),
+            out=self.offsets[1:],
+        )
+        self.popularity = numpy.bincount(self.authors, minlength=size)
+
+    def users(self):
+        return numpy.flatnonzero(numpy.diff(self.offsets)).tolist()
+
+    def followed(self, user_id):
+        if user_id + 1 >= len(self.offsets):
+            return self.authors[:0]
+        return self.authors[self.offsets[user_id]:self.offsets[user_id + 1]]
+
+    def suggest(self, user_id, limit):
+        followed = self.followed(user_id)
+        starts = self.offsets[followed]
+        lengths = self.offsets[followed + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return []
+        # Индексы подписок всех авторов пользователя одним массивом:
+        # для каждого автора — его начало плюс 0, 1, ... длина - 1
+        ends = numpy.cumsum(lengths)
+        shifts = numpy.repeat(starts - ends + lengths, lengths)
+        ids, scores = numpy.unique(
+            self.authors[shifts + numpy.arange(total)], return_counts=True
+        )
+        keep = ~numpy.isin(ids, followed, assume_unique=True)
+        keep &= ids != user_id
+        ids, scores = ids[keep], scores[keep]
+        order = numpy.lexsort((ids, -self.popularity[ids], -scores))[:limit]
+        return list(zip(ids[order].tolist(), scores[order].tolist()))
+
+
+def load_graph():
+    edges = Follow.objects.order_by().values_list('user_id', 'author_id')
+    if numpy is None:
+        return Graph(edges.iterator())
+    return NumpyGraph(list(edges))
+
+
+def store(graph, user_ids, limit):
+    """Заменяет рекомендации пользователей, возвращает число строк."""
+    rows = [
+        {'user_id': user_id, 'author_id': author_id, 'rank': rank,
+         'score': score}
+        for user_id in user_ids
+        for rank, (author_id, score) in enumerate(
+            graph.suggest(user_id, limit), 1
+        )
+    ]
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        insert(Recommendation, rows)
+    return len(rows)
+
+
+def build(full=False, limit=None):
+    """Пересчитывает рекомендации всем или только устаревшим.
+
+    Отметки об устаревании снимаются до чтения графа: подписка,
+    сделанная во время расчёта, поставит отметку заново и попадёт в
+    следующий запуск. Возвращает число пользователей и строк.
+    """
+    limit = limit or settings.RECOMMENDATIONS_LIMIT
+    if full:
+        StaleRecommendations.objects.all().delete()
+        # Тем, кто ни на кого больше не подписан, советовать нечего
+        Recommendation.objects.exclude(
+            user__in=Follow.objects.values('user')
+        ).delete()
+        graph = load_graph()
+        user_ids = graph.users()
+    else:
+        user_ids = list(
+            StaleRecommendations.objects.values_list('user_id', flat=True)
+        )
+        if not user_ids:
+            return 0, 0
+        for chunk in chunks(user_ids):
+            StaleRecommendations.objects.filter(user_id__in=chunk).delete()
+        graph = load_graph()
+    rows = 0
+    for chunk in chunks(user_ids):
+        rows += store(graph, chunk, limit)
+        caching.forget(f'feed:{user_id}' for user_id in chunk)
+    return len(user_ids), rows
+
+
+def chunks(user_ids):
+    for start in range(0, len(user_ids), USERS_PER_TRANSACTION):
+        yield user_ids[start:start + USERS_PER_TRANSACTION]
+
+
+def mark_stale(user_id, followed_id=None):
+    """Отмечает рекомендации пользователя к пересчёту.
+
+    Автор followed_id, на которого он только что подписался, убирается
+    из рекомендаций сразу, не дожидаясь пересчёта.
+    """
+    StaleRecommendations.objects.bulk_create(
+        [StaleRecommendations(user_id=user_id)], ignore_conflicts=True
+    )
+    if followed_id is not None:
+        Recommendation.objects.filter(
+            user_id=user_id, author_id=followed_id
+        ).delete()
+
+
+def recommendations(user, limit=None):
+    """Рекомендованные авторы для ленты пользователя.
+
+    Один запрос по уникальному индексу (user, rank).
+    """
+    if not user.is_authenticated:
+        return []
+    rows = Recommendation.objects.filter(user_id=user.id).select_related(
+        'author'
+    ).order_by('rank')[:limit or settings.RECOMMENDATIONS_SHOWN]
+    return [row.author for row in rows]
@@ -0,0 +1,168 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from . import caching
+from .models import Post
+from .stemmer import stem
+from .utils import CursorPage, CursorPaginator, read_cursor, write_cursor
+
+WORD = re.compile(r'\w+')
+
+
+def terms(text):
+    return [stem(word) for word in WORD.findall(text)]
+
+
+def get_backend():
+    return import_string(settings.SEARCH_BACKEND)()
+
+
+def index_post(post_id):
+    """Задача очереди: заносит пост в индекс, если он ещё существует.
+
+    Задача выполняется позже сохранения, поэтому страницы поиска,
+    закэшированные до неё, сбрасываются заново.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        get_backend().update(post)
+        caching.bump('posts')
+
+
+class SearchBackend:
+    """Поиск по текстам постов.
+
+    page() отдаёт CursorPage с постами по запросу, update() и remove()
+    вызываются при сохранении и удалении поста, rebuild() строит индекс
+    заново.
+    """
+
+    def page(self, query, cursor=None, per_page=settings.CUT_LENGTH):
+        raise NotImplementedError
+
+    def update(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class LikeBackend(SearchBackend):
+    """Поиск подстрокой через LIKE, без индекса, по дате публикации."""
+
+    def page(self, query, cursor=None, per_page=settings.CUT_LENGTH):
+        posts = Post.objects.select_related('author', 'group')
+        for word in query.split():
+            posts = posts.filter(text__icontains=word)
+        return CursorPaginator(posts, per_page).get_cursor_page(cursor)
+
+
+class FTSBackend(SearchBackend):
+    """Полнотекстовый поиск на SQLite FTS5 с ранжированием по bm25.
+
+    В индекс попадают основы слов, поэтому «книгами» находит «книга».
+    Страницы выбираются по ключу (rank, rowid) относительно последней
+    показанной записи.
+    """
+
+    table = 'posts_post_fts'
+
+    def match(self, query):
+        return ' '.join(f'"{term}"*' for term in terms(query))
+
+    def page(self, query, cursor=None, per_page=settings.CUT_LENGTH):
+        match = self.match(query)
+        if not match:
+            return CursorPage([], None, None, None)
+        direction, key = self.decode_cursor(cursor)
+        backward = direction == 'prev'
+        compare, order = ('<', 'DESC') if backward else ('>', 'ASC')
+        sql = (
+            f'SELECT rowid, rank FROM {self.table}'
+            f' WHERE {self.table} MATCH %s'
+        )
+        params = [match]
+        if key is not None:
+            sql += (
+                f' AND (rank {compare} %s'
+                f' OR (rank = %s AND rowid {compare} %s))'
+            )
+            params += [key[0], key[0], key[1]]
+        sql += f' ORDER BY rank {order}, rowid {order} LIMIT %s'
+        params.append(per_page + 1)
+        with connection.cursor() as db:
+            db.execute(sql, params)
+            rows = db.fetchall()
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        if backward:
+            rows.reverse()
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [post_id for post_id, _ in rows]
+        )
+        has_next = has_more or backward
+        has_previous = has_more if backward else key is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], 'next')
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], 'prev')
+        return CursorPage(
+            [posts[post_id] for post_id, _ in rows if post_id in posts],
+            None,
+            next_cursor,
+            previous_cursor,
+        )
+
+    @staticmethod
+    def encode_cursor(row, direction):
+        post_id, rank = row
+        return write_cursor(direction, [rank, post_id])
+
+    @staticmethod
+    def decode_cursor(cursor):
+        if not cursor:
+            return None, None
+        direction, key = read_cursor(cursor, [float, int])
+        return direction, key and tuple(key)
+
+    def update(self, post):
+        with connection.cursor() as db:
+            db.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post.id])
+            db.execute(
+                f'INSERT INTO {self.table} (rowid, text) VALUES (%s, %s)',
+                [post.id, ' '.join(terms(post.text))],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as db:
+            db.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def rebuild(self, batch_size=1000):
+        count = 0
+        posts = Post.objects.values_list('id', 'text')
+        with connection.cursor() as db:
+            db.execute(f'DELETE FROM {self.table}')
+            batch = []
+            for post_id, text in posts.iterator():
+                batch.append((post_id, ' '.join(terms(text))))
+                if len(batch) == batch_size:
+                    count += self._insert(db, batch)
+                    batch = []
+            count += self._insert(db, batch)
+            db.execute(
+                f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')"
+            )
+        return count
+
+    def _insert(self, db, rows):
+        db.executemany(
+            f'INSERT INTO {self.table} (rowid, text) VALUES (%s, %s)', rows
+        )
+        return len(rows)
@@ -0,0 +1,185 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import jobs
+
+from . import caching, feed, follows, notifications, recommendations, search
+from .counters import bump
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+@receiver(pre_save, sender=Group)
+def group_remember_slug(sender, instance, **kwargs):
+    instance._saved_slug = None
+    if instance.pk is not None:
+        instance._saved_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_invalidate(sender, instance, **kwargs):
+    # После смены адреса страница по старому должна перестать отдаваться
+    saved_slug = getattr(instance, '_saved_slug', None)
+    caching.bump(
+        'posts',
+        *{f'group:{slug}' for slug in (instance.slug, saved_slug) if slug},
+    )
+
+
+@receiver(post_save, sender=User)
+def user_create_counters(sender, instance, created, **kwargs):
+    if created:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_remember_group(sender, instance, **kwargs):
+    instance._saved_group_id = None
+    if instance.pk is not None:
+        instance._saved_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+def invalidate_post(post, *group_ids, feeds=True):
+    """Сбрасывает страницы с постом; ленты подписчиков — в очереди."""
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True
+    )
+    caching.bump(
+        'posts',
+        f'author:{post.author.username}',
+        f'post:{post.id}',
+        *(f'group:{slug}' for slug in slugs),
+    )
+    if feeds:
+        jobs.enqueue(feed.invalidate, post.author_id)
+
+
+@receiver(post_save, sender=Post)
+def post_fan_out(sender, instance, created, **kwargs):
+    # Новый пост сбросит ленты сам, когда разложится по ним
+    invalidate_post(
+        instance, instance.group_id, instance._saved_group_id,
+        feeds=not created,
+    )
+    if created:
+        jobs.enqueue(
+            feed.fan_out_post, instance.id, key=f'fan-out:{instance.id}'
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_count(sender, instance, created, **kwargs):
+    if created:
+        bump(UserCounters, instance.author_id, 'posts_count', 1)
+        bump(Group, instance.group_id, 'posts_count', 1)
+    elif instance._saved_group_id != instance.group_id:
+        bump(Group, instance._saved_group_id, 'posts_count', -1)
+        bump(Group, instance.group_id, 'posts_count', 1)
+
+
+@receiver(post_delete, sender=Post)
+def post_invalidate(sender, instance, **kwargs):
+    invalidate_post(instance, instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def post_uncount(sender, instance, **kwargs):
+    bump(UserCounters, instance.author_id, 'posts_count', -1)
+    bump(Group, instance.group_id, 'posts_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def post_index(sender, instance, **kwargs):
+    jobs.enqueue(search.index_post, instance.id)
+
+
+@receiver(post_delete, sender=Post)
+def post_unindex(sender, instance, **kwargs):
+    search.get_backend().remove(instance.id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_invalidate(sender, instance, **kwargs):
+    caching.bump(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Comment)
+def comment_count(sender, instance, created, **kwargs):
+    if created:
+        bump(Post, instance.post_id, 'comments_count', 1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_notify(sender, instance, created, **kwargs):
+    if created:
+        jobs.enqueue(
+            notifications.comment_email,
+            instance.id,
+            key=f'comment-email:{instance.id}',
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def comment_uncount(sender, instance, **kwargs):
+    bump(Post, instance.post_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_invalidate(sender, instance, **kwargs):
+    follows.forget(instance.user)
+    caching.forget((f'feed:{instance.user_id}',))
+    caching.bump(
+        f'author:{instance.author.username}',
+        f'author:{instance.user.username}',
+        f'follows:{instance.user_id}',
+    )
+
+
+@receiver(post_save, sender=Follow)
+def follow_count(sender, instance, created, **kwargs):
+    if created:
+        bump(UserCounters, instance.author_id, 'followers_count', 1)
+        bump(UserCounters, instance.user_id, 'following_count', 1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_backfill(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_drop(sender, instance, **kwargs):
+    feed.drop(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_uncount(sender, instance, **kwargs):
+    bump(UserCounters, instance.author_id, 'followers_count', -1)
+    bump(UserCounters, instance.user_id, 'following_count', -1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_cool_down(sender, instance, **kwargs):
+    # Автор только что перестал быть «горячим»: его посты за это время
+    # нужно разложить по лентам оставшихся подписчиков
+    if UserCounters.objects.filter(
+        user_id=instance.author_id,
+        followers_count=settings.FEED_FANOUT_LIMIT,
+    ).exists():
+        jobs.enqueue(feed.cool_down, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_recommendations(sender, instance, created=False, **kwargs):
+    recommendations.mark_stale(
+        instance.user_id, instance.author_id if created else None
+    )
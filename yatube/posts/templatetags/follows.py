@@ -0,0 +1,11 @@
+from django import template
+
+from posts.follows import followed_ids
+
+register = template.Library()
+
+
+@register.filter
+def followed_by(author, user):
+    """Подписан ли user на автора: {% if author|followed_by:user %}."""
+    return getattr(author, 'pk', author) in followed_ids(user)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from core.asgi import BUFFER_SIZE, ASGIHandler, wsgi_environ
+from posts.benchmarks import load
+
+
+def echo(environ, start_response):
+    body = environ['wsgi.input'].read(int(environ['CONTENT_LENGTH']))
+    start_response('201 Created', [('Content-Type', 'text/plain')])
+    return [environ['PATH_INFO'].encode('latin1'), b':', body]
+
+
+def large(environ, start_response):
+    start_response('200 OK', [])
+    return (b'x' * 1024 for _ in range(BUFFER_SIZE // 1024 + 10))
+
+
+def call(application, path='/', body=b'', headers=()):
+    """Выполняет запрос к ASGI-приложению, возвращает отправленное."""
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'POST' if body else 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': list(headers),
+    }
+    incoming = [
+        {'type': 'http.request', 'body': body[:3], 'more_body': True},
+        {'type': 'http.request', 'body': body[3:]},
+    ]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class Quiet(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class ASGITests(SimpleTestCase):
+    def test_django_page(self):
+        start, body = call(
+            ASGIHandler(get_wsgi_application(), 2), '/about/author/'
+        )
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), start['headers']
+        )
+        self.assertIn('Об авторе'.encode(), body['body'])
+
+    def test_request_body_and_headers(self):
+        start, body = call(
+            ASGIHandler(echo, 1), '/путь/', b'hello',
+            [(b'content-length', b'5')],
+        )
+        self.assertEqual(start['status'], 201)
+        self.assertEqual(body['body'], '/путь/:hello'.encode())
+
+    def test_repeated_headers_are_joined(self):
+        environ = wsgi_environ({
+            'method': 'GET',
+            'path': '/',
+            'query_string': b'',
+            'http_version': '1.1',
+            'headers': [
+                (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+                (b'accept', b'text/html'), (b'accept', b'*/*'),
+            ],
+        }, None)
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+
+    def test_large_response_is_streamed(self):
+        start, *chunks = call(ASGIHandler(large, 1))
+        self.assertEqual(start['status'], 200)
+        self.assertTrue(chunks[0]['more_body'])
+        self.assertFalse(chunks[-1].get('more_body'))
+        self.assertEqual(
+            sum(len(chunk['body']) for chunk in chunks),
+            BUFFER_SIZE + 10 * 1024,
+        )
+
+    def test_lifespan(self):
+        incoming = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(
+            ASGIHandler(echo, 1)({'type': 'lifespan'}, receive, send)
+        )
+        self.assertEqual(
+            sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        )
+
+    def test_load_reports_latency(self):
+        server = make_server(
+            '127.0.0.1', 0, large, handler_class=Quiet
+        )
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            result = load(
+                f'http://127.0.0.1:{server.server_port}', ['/a', '/b'],
+                concurrency=2, requests=5,
+            )
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+        self.assertEqual(result['statuses'], {200: 5})
+        self.assertGreater(result['rps'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+    def test_load_reraises_client_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            load('http://127.0.0.1:1', [], concurrency=1, requests=1)
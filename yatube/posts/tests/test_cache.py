@@ -0,0 +1,45 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from core.cache import TieredCache
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = TieredCache('shared', {
+            'OPTIONS': {'LOCAL_PREFIXES': ['page:'], 'LOCAL_MAX_ENTRIES': 2},
+        })
+        self.cache.clear()
+        self.shared = caches['shared']
+
+    def test_page_keys_are_served_from_process_memory(self):
+        self.cache.set('page:index', ['страница'])
+        before = self.cache.stats()
+        value = self.cache.get('page:index')
+        self.assertEqual(value, ['страница'])
+        value.append('изменение')
+        self.shared.delete('page:index')
+        self.assertEqual(self.cache.get('page:index'), ['страница'])
+        after = self.cache.stats()
+        self.assertEqual(after['local']['hits'] - before['local']['hits'], 2)
+        self.assertEqual(after['shared'], before['shared'])
+
+    def test_other_keys_always_read_shared_store(self):
+        self.cache.set('generation:posts', 1)
+        self.shared.set('generation:posts', 2)
+        self.assertEqual(self.cache.get('generation:posts'), 2)
+        self.assertEqual(self.cache.get_many(['generation:posts']), {
+            'generation:posts': 2,
+        })
+
+    def test_least_recently_used_page_is_evicted(self):
+        for name in ('a', 'b', 'c'):
+            self.cache.set(f'page:{name}', name)
+        self.shared.clear()
+        self.assertIsNone(self.cache.get('page:a'))
+        self.assertEqual(self.cache.get('page:c'), 'c')
+
+    def test_shared_misses_are_counted(self):
+        before = self.cache.stats()['shared']['misses']
+        self.assertIsNone(self.cache.get('page:missing'))
+        self.assertEqual(self.cache.stats()['shared']['misses'], before + 1)
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Post, User
+
+from yatube.settings import COMMENTS_LENGTH
+
+COMMENT_COUNT = COMMENTS_LENGTH + 5
+
+
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.post = Post.objects.create(text='Text post', author=cls.author)
+        for i in range(COMMENT_COUNT):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'comment {i}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_post_detail_shows_first_page(self):
+        response = self.author_client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_LENGTH)
+        self.assertEqual(comments[0].text, 'comment 0')
+        self.assertTrue(comments.has_next())
+        self.assertContains(response, 'more-comments')
+
+    def test_next_chunk_as_html_and_json(self):
+        response = self.author_client.get(
+            reverse('posts:post_detail', args=(self.post.id,))
+        )
+        cursor = response.context['comments'].next_cursor
+        url = reverse('posts:post_comments', args=(self.post.id,))
+        response = self.author_client.get(f'{url}?cursor={cursor}')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertContains(response, f'comment {COMMENT_COUNT - 1}')
+        self.assertNotContains(response, 'more-comments')
+        response = self.author_client.get(
+            f'{url}?cursor={cursor}&format=json'
+        )
+        data = response.json()
+        self.assertEqual(
+            len(data['comments']), COMMENT_COUNT - COMMENTS_LENGTH
+        )
+        self.assertEqual(data['comments'][0]['author'], self.author.username)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_comment_queries_do_not_grow(self):
+        url = reverse('posts:post_comments', args=(self.post.id,))
+        with self.assertNumQueries(4):
+            self.author_client.get(url)
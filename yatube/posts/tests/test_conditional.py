@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='slug-group',
+            description='Описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Текст', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_return_304_without_rendering(self):
+        # post_detail узнаёт автора поста для области кэша одним запросом
+        urls = (
+            (reverse('posts:index'), 0),
+            (reverse('posts:group_posts', args=(self.group.slug,)), 0),
+            (reverse('posts:profile', args=(self.author.username,)), 0),
+            (reverse('posts:post_detail', args=(self.post.id,)), 1),
+        )
+        for url, queries in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                self.assertIn('no-cache', response['Cache-Control'])
+                self.assertIn('private', response['Cache-Control'])
+                with self.assertNumQueries(queries):
+                    response = self.revalidate(url, response['ETag'])
+                self.assertEqual(response.status_code, 304)
+
+    def test_changes_give_new_validators(self):
+        index = reverse('posts:index')
+        detail = reverse('posts:post_detail', args=(self.post.id,))
+        index_etag = self.client.get(index)['ETag']
+        detail_etag = self.client.get(detail)['ETag']
+        Comment.objects.create(post=self.post, author=self.author, text='!')
+        self.assertEqual(self.revalidate(index, index_etag).status_code, 304)
+        self.assertEqual(self.revalidate(detail, detail_etag).status_code, 200)
+        Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.revalidate(index, index_etag).status_code, 200)
+
+    def test_validators_differ_per_user(self):
+        index = reverse('posts:index')
+        etag = self.client.get(index)['ETag']
+        self.client.force_login(self.author)
+        self.assertEqual(self.revalidate(index, etag).status_code, 200)
+
+    def test_if_modified_since_alone_is_not_trusted(self):
+        index = reverse('posts:index')
+        last_modified = self.client.get(index)['Last-Modified']
+        Post.objects.create(text='Новый пост', author=self.author)
+        response = self.client.get(
+            index, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
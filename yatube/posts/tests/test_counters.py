@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User, UserCounters
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.user = User.objects.create_user(username='mav')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='slug-group',
+            description='Описание группы',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-group',
+            description='Описание группы',
+        )
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_post_counters(self):
+        post = Post.objects.create(
+            text='Text post', author=self.author, group=self.group
+        )
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.other_group.posts_count, 0)
+        self.assertEqual(self.counters(self.author).posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        post = Post.objects.create(text='Text post', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='comment'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.user).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.user).following_count, 0)
+
+    def test_profile_reads_counters(self):
+        Post.objects.create(text='Text post', author=self.author)
+        client = Client()
+        client.force_login(self.user)
+        cache.clear()
+        # Счётчики читаются вместе с автором, подписки — одним запросом
+        with self.assertNumQueries(5):
+            response = client.get(
+                reverse('posts:profile', args=(self.author.username,))
+            )
+        self.assertEqual(response.context['counters'].posts_count, 1)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
+        self.assertFalse(response.context['following'])
+
+    def test_index_pages_read_counters(self):
+        for author in (self.author, self.user):
+            Post.objects.create(text='Text post', author=author)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:index'), {'page': 1})
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        self.assertFalse([
+            query for query in queries
+            if 'COUNT(' in query['sql'] and 'posts_post' in query['sql']
+        ])
+
+    def test_reconcile_counters(self):
+        Post.objects.create(text='Text post', author=self.author)
+        UserCounters.objects.filter(user=self.author).update(posts_count=7)
+        UserCounters.objects.filter(user=self.user).delete()
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.user).posts_count, 0)
@@ -0,0 +1,93 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import export
+from posts.models import Comment, Group, Post, User
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='slug-group',
+            description='Описание группы',
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост, "{number}"', author=cls.author, group=cls.group
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Комментарий'
+        )
+
+    def test_rows_are_read_in_keyset_chunks(self):
+        # Пять строк кусками по две — три запроса, последний неполный;
+        # кусками по одной — ещё один пустой запрос в конце
+        with self.assertNumQueries(3):
+            rows = list(export.rows('posts', chunk_size=2))
+        self.assertEqual(
+            [row[0] for row in rows], [post.id for post in self.posts]
+        )
+        with self.assertNumQueries(6):
+            self.assertEqual(len(list(export.rows('posts', chunk_size=1))), 5)
+
+    def test_ndjson_and_csv(self):
+        first = json.loads(next(export.lines('posts')))
+        self.assertEqual(first['id'], self.posts[0].id)
+        self.assertEqual(first['author'], 'shav')
+        self.assertEqual(first['group'], 'slug-group')
+        text = ''.join(export.lines('posts', 'csv'))
+        table = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(table[0][:2], ['id', 'text'])
+        self.assertEqual(table[1][1], 'Пост, "0"')
+        self.assertEqual(len(table), 6)
+
+    def test_gzip_on_the_fly(self):
+        chunks = list(
+            export.encode(export.lines('comments'), True, buffer_size=1)
+        )
+        [row] = gzip.decompress(b''.join(chunks)).decode().splitlines()
+        self.assertEqual(json.loads(row)['text'], 'Комментарий')
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.ndjson.gz')
+            call_command(
+                'export_posts', '--gzip', '--output', path,
+                stderr=io.StringIO(),
+            )
+            with gzip.open(path, 'rt') as file:
+                self.assertEqual(len(file.readlines()), 5)
+
+    def test_endpoint_is_for_staff(self):
+        url = reverse('api:export', args=('posts',))
+        client = Client()
+        self.assertEqual(client.get(url).status_code, 401)
+        client.force_login(self.author)
+        self.assertEqual(client.get(url).status_code, 403)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client.force_login(staff)
+        response = client.get(url, {'format': 'csv', 'gzip': '1'})
+        self.assertTrue(response.streaming)
+        self.assertIn('posts.csv.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(content.decode().splitlines()), 6)
+        self.assertEqual(
+            client.get(url, {'format': 'xml'}).status_code, 400
+        )
+        self.assertEqual(
+            client.get(reverse('api:export', args=('users',))).status_code,
+            404,
+        )
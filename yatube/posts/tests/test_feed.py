@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import FeedEntry, Follow, Post, User
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.user = User.objects.create_user(username='mav')
+        cls.post = Post.objects.create(text='Text post', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def feed(self):
+        response = self.user_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_and_unfollow_drops_feed(self):
+        self.assertEqual(self.feed(), [])
+        self.user_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertEqual(self.feed(), [self.post])
+        self.user_client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertEqual(self.feed(), [])
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+
+    def test_new_post_fans_out_to_followers(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='New post', author=self.author)
+        self.assertEqual(self.feed(), [post, self.post])
+        post.delete()
+        self.assertEqual(self.feed(), [self.post])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_hot_author_posts_are_read_on_request(self):
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='New post', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed(), [post, self.post])
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_posts_of_hot_era_stay_when_author_cools_down(self):
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text='New post', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        Follow.objects.filter(user=other).delete()
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.assertEqual(self.feed(), [post, self.post])
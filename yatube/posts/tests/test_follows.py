@@ -0,0 +1,132 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.follows import followed_ids, is_following
+from posts.models import Follow, User
+from yatube.settings import FOLLOWS_LENGTH
+
+
+class FollowsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='mav')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{number}')
+            for number in range(5)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=cls.user, author=author) for author in cls.authors[:2]
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Свой объект на тест: множество подписок запоминается на нём
+        self.viewer = User(pk=self.user.pk)
+
+    def test_state_for_many_authors_in_one_query(self):
+        author_ids = [author.id for author in self.authors]
+        with self.assertNumQueries(1):
+            state = is_following(self.viewer, author_ids)
+            is_following(self.viewer, author_ids)
+        self.assertEqual(
+            [state[author_id] for author_id in author_ids],
+            [True, True, False, False, False],
+        )
+        # Другой объект того же пользователя берёт множество из кэша
+        with self.assertNumQueries(0):
+            is_following(User(pk=self.user.pk), author_ids)
+
+    def test_follow_and_unfollow_reset_cache(self):
+        self.assertNotIn(self.authors[2].id, followed_ids(self.viewer))
+        follow = Follow.objects.create(
+            user=self.viewer, author=self.authors[2]
+        )
+        self.assertIn(self.authors[2].id, followed_ids(self.viewer))
+        follow.delete()
+        self.assertNotIn(
+            self.authors[2].id, followed_ids(User(pk=self.user.pk))
+        )
+
+    def test_anonymous_follows_nobody(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                is_following(AnonymousUser(), [self.authors[0].id]),
+                {self.authors[0].id: False},
+            )
+
+    def test_template_filter(self):
+        template = Template(
+            '{% load follows %}'
+            '{% for author in authors %}'
+            '{% if author|followed_by:user %}+{% else %}-{% endif %}'
+            '{% endfor %}'
+        )
+        with self.assertNumQueries(1):
+            rendered = template.render(
+                Context({'authors': self.authors, 'user': self.viewer})
+            )
+        self.assertEqual(rendered, '++---')
+
+    def test_profile_shows_follow_state(self):
+        client = Client()
+        client.force_login(self.user)
+        url = reverse('posts:profile', args=(self.authors[2].username,))
+        self.assertFalse(client.get(url).context['following'])
+        client.get(
+            reverse('posts:profile_follow', args=(self.authors[2].username,))
+        )
+        self.assertTrue(client.get(url).context['following'])
+
+
+class FollowListTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.followers = [
+            User.objects.create_user(username=f'reader_{number}')
+            for number in range(FOLLOWS_LENGTH + 5)
+        ]
+        for user in cls.followers:
+            Follow.objects.create(user=user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.followers[0])
+
+    def test_followers_newest_first_by_cursor(self):
+        url = reverse('posts:followers', args=(self.author.username,))
+        # Сессия, пользователь, автор со счётчиками, страница подписок
+        # с подписчиками и подписки смотрящего
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+        page_obj = response.context['page_obj']
+        self.assertEqual(
+            response.context['people'],
+            self.followers[::-1][:FOLLOWS_LENGTH],
+        )
+        self.assertEqual(page_obj.paginator.count, len(self.followers))
+        # Дальше подписки смотрящего уже в кэше
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'cursor': page_obj.next_cursor})
+        self.assertEqual(
+            response.context['people'], self.followers[4::-1]
+        )
+
+    def test_following_and_follow_buttons(self):
+        url = reverse('posts:following', args=(self.followers[1].username,))
+        response = self.client.get(url)
+        self.assertEqual(response.context['people'], [self.author])
+        self.assertContains(response, 'Отписаться')
+        self.client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertContains(self.client.get(url), 'Подписаться')
+
+    def test_unknown_user(self):
+        url = reverse('posts:following', args=('nobody',))
+        self.assertEqual(self.client.get(url).status_code, 404)
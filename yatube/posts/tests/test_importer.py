@@ -0,0 +1,155 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from posts import export, recommendations
+from posts.importer import Importer, indexes_deferred, read
+from posts.models import (FeedEntry, Follow, Group, Post, Recommendation,
+                          User)
+from posts.search import get_backend
+
+
+class ImporterTests(TestCase):
+    def setUp(self):
+        self.importer = Importer(chunk_size=2)
+
+    def load_people(self):
+        self.importer.load('users', [
+            {'username': 'shav', 'first_name': 'Иван'},
+            {'username': 'reader'},
+        ])
+        self.importer.load('groups', [
+            {'title': 'Группа', 'slug': 'slug-group', 'description': ''},
+        ])
+
+    def test_round_trip_through_export(self):
+        self.load_people()
+        count, _ = self.importer.load('posts', [
+            {'text': f'Книга {number}', 'author': 'shav',
+             'group': 'slug-group', 'pub_date': f'2020-01-0{number}T10:00Z'}
+            for number in range(1, 6)
+        ])
+        self.assertEqual(count, 5)
+        post = Post.objects.order_by('pub_date').first()
+        self.assertEqual(post.author.username, 'shav')
+        self.assertEqual(
+            post.pub_date.isoformat(), '2020-01-01T10:00:00+00:00'
+        )
+        self.importer.load('comments', [
+            {'post': post.id, 'author': 'reader', 'text': 'Комментарий'},
+        ])
+        self.importer.load('follows', [
+            {'user': 'reader', 'following': 'shav'},
+        ])
+        self.importer.finish()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Group.objects.get().posts_count, 5)
+        reader = User.objects.get(username='reader')
+        self.assertFalse(reader.has_usable_password())
+        self.assertEqual(reader.counters.following_count, 1)
+        self.assertEqual(len(get_backend().page('книгами')), 5)
+        rows = list(read(io.StringIO(''.join(export.lines('posts')))))
+        self.assertEqual(rows[0]['group'], 'slug-group')
+
+    def test_unknown_author(self):
+        with self.assertRaisesMessage(ValueError, 'Строка 1'):
+            self.importer.load('posts', [{'text': 'Пост', 'author': 'x'}])
+        self.assertFalse(Post.objects.exists())
+
+    def test_indexes_are_rebuilt(self):
+        def indexes():
+            with connection.cursor() as cursor:
+                return set(connection.introspection.get_constraints(
+                    cursor, Post._meta.db_table
+                ))
+
+        before = indexes()
+        self.assertIn('post_pub_date_idx', before)
+        with indexes_deferred(Post) as statements:
+            self.assertNotIn('post_pub_date_idx', indexes())
+            # Команды можно выполнить повторно, если процесс прервут
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+                    cursor.execute(sql)
+        self.assertEqual(indexes(), before)
+
+    def test_command_reads_csv(self):
+        User.objects.create_user(username='shav')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('text,author,group\n"Пост, один",shav,\n')
+            output = io.StringIO()
+            call_command(
+                'bulk_import', '--posts', path, '--defer-indexes',
+                stdout=output,
+            )
+            self.assertIn('posts: 1 строк', output.getvalue())
+            self.assertIn(
+                'CREATE INDEX IF NOT EXISTS "post_pub_date_idx"',
+                output.getvalue(),
+            )
+            self.assertEqual(Post.objects.get().text, 'Пост, один')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('text,author\nПост,nobody\n')
+            with self.assertRaises(CommandError):
+                call_command('bulk_import', '--posts', path, stdout=output)
+
+    def test_feed_gets_only_imported_follows_and_posts(self):
+        self.load_people()
+        old = User.objects.create_user(username='old')
+        # Запись, которую finish() не должен трогать
+        post = Post.objects.create(text='Старый', author=old)
+        FeedEntry.objects.filter(post=post).delete()
+        reader = User.objects.get(username='reader')
+        Follow.objects.bulk_create([Follow(user=reader, author=old)])
+        self.importer.load('posts', [{'text': 'Новый', 'author': 'shav'}])
+        self.importer.load('follows', [
+            {'user': 'reader', 'following': 'shav'},
+        ])
+        self.importer.finish()
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post__text')),
+            [(reader.id, 'Новый')],
+        )
+
+    def test_imported_follows_refresh_recommendations(self):
+        self.load_people()
+        User.objects.create_user(username='popular')
+        self.importer.load('follows', [
+            {'user': 'shav', 'following': 'popular'},
+        ])
+        self.importer.finish()
+        recommendations.build()
+        importer = Importer()
+        importer.load('follows', [{'user': 'reader', 'following': 'shav'}])
+        importer.finish()
+        self.assertEqual(recommendations.build(), (1, 1))
+        self.assertEqual(
+            list(Recommendation.objects.values_list(
+                'user__username', 'author__username'
+            )),
+            [('reader', 'popular')],
+        )
+
+    def test_duplicate_names_the_kind_and_rows(self):
+        self.load_people()
+        with self.assertRaisesMessage(
+            ValueError, 'строки 1-2 не загружены'
+        ):
+            self.importer.load('users', [
+                {'username': 'new'}, {'username': 'shav'},
+            ])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write('username\nshav\n')
+            with self.assertRaisesMessage(CommandError, 'users: строки 1-1'):
+                call_command('bulk_import', '--users', path,
+                             stdout=io.StringIO())
@@ -0,0 +1,80 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from posts.models import Comment, Follow, Group, Post, User
+
+POST_COUNT = 15
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(posts_\w+|auth_user)( AS \w+)?$')
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.user = User.objects.create_user(username='mav')
+        cls.group = Group.objects.create(
+            title='Название группы',
+            slug='slug-group',
+            description='Описание группы',
+        )
+        for i in range(POST_COUNT):
+            cls.post = Post.objects.create(
+                text=f'Text post {i}',
+                author=cls.author,
+                group=cls.group,
+            )
+        Comment.objects.create(post=cls.post, author=cls.user, text='text')
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.user_client = Client()
+        self.user_client.force_login(self.user)
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_indexed(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.user_client.get(url)
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'posts_' not in sql:
+                continue
+            for detail in self.plan(sql):
+                with self.subTest(url=url, sql=sql, detail=detail):
+                    self.assertNotIn('TEMP B-TREE', detail)
+                    self.assertIsNone(FULL_SCAN.match(detail))
+        return response
+
+    def test_views_use_indexes(self):
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_posts', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:post_detail', args=(self.post.id,)),
+            reverse('posts:follow_index'),
+            reverse('posts:followers', args=(self.author.username,)),
+            reverse('posts:following', args=(self.user.username,)),
+        )
+        for url in urls:
+            response = self.assert_indexed(url)
+            page_obj = response.context.get('page_obj')
+            if page_obj is not None and page_obj.has_next():
+                self.assert_indexed(f'{url}?cursor={page_obj.next_cursor}')
+
+    def test_follow_is_unique(self):
+        self.user_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertEqual(
+            Follow.objects.filter(user=self.user, author=self.author).count(),
+            1,
+        )
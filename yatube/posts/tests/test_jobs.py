@@ -0,0 +1,139 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from core import jobs
+from core.models import Job
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from posts.models import Comment, FeedEntry, Follow, Post, User
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def broken():
+    raise RuntimeError('сломалось')
+
+
+def immediately(callback):
+    callback()
+
+
+@override_settings(JOBS_EAGER=False)
+@mock.patch('core.jobs.transaction.on_commit', immediately)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        jobs.enqueue(record, 1)
+        jobs.enqueue('posts.tests.test_jobs.record', 2)
+        self.assertEqual(calls, [])
+        for value in (1, 2):
+            job = jobs.claim('test')
+            self.assertEqual(job.status, Job.RUNNING)
+            self.assertEqual(job.attempts, 1)
+            self.assertTrue(jobs.run(job))
+        self.assertIsNone(jobs.claim('test'))
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(
+            Job.objects.filter(status=Job.DONE).count(), 2
+        )
+
+    def test_idempotency_key(self):
+        for _ in range(3):
+            jobs.enqueue(record, 1, key='once')
+        self.assertEqual(Job.objects.count(), 1)
+        jobs.run(jobs.claim('test'))
+        jobs.enqueue(record, 1, key='once')
+        self.assertIsNone(jobs.claim('test'))
+
+    @override_settings(JOBS_RETRY_DELAY=10)
+    def test_retries_with_backoff_then_fails(self):
+        jobs.enqueue(broken, max_attempts=2)
+        job = jobs.claim('test')
+        self.assertFalse(jobs.run(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('сломалось', job.last_error)
+        delay = (job.run_at - timezone.now()).total_seconds()
+        self.assertTrue(9 < delay <= 11)
+        self.assertIsNone(jobs.claim('test'))
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertFalse(jobs.run(jobs.claim('test')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_abandoned_job_is_taken_again(self):
+        jobs.enqueue(record, 1)
+        jobs.claim('dead')
+        self.assertIsNone(jobs.claim('test'))
+        Job.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(jobs.claim('test').worker, 'test')
+
+    def test_purge_keeps_recent_jobs(self):
+        jobs.enqueue(record, 1)
+        jobs.run(jobs.claim('test'))
+        self.assertEqual(jobs.purge(), 0)
+        Job.objects.update(finished=timezone.now() - timedelta(days=2))
+        self.assertEqual(jobs.purge(), 1)
+
+    def test_run_worker_drains_queue(self):
+        for value in range(3):
+            jobs.enqueue(record, value)
+        jobs.enqueue(broken, max_attempts=1)
+        output = io.StringIO()
+        with self.assertLogs('core.jobs', 'ERROR'):
+            call_command(
+                'run_worker', '--workers', '0', '--once', stdout=output
+            )
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertIn('Выполнено: 3, с ошибкой: 1', output.getvalue())
+
+    def test_writes_leave_side_effects_to_queue(self):
+        author = User.objects.create_user(username='shav', email='a@b.c')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(text='Текст', author=author)
+        Comment.objects.create(post=post, author=reader, text='!')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        self.assertEqual(
+            sorted(Job.objects.values_list('name', flat=True)),
+            [
+                'posts.feed.fan_out_post',
+                'posts.notifications.comment_email',
+                'posts.search.index_post',
+            ],
+        )
+        call_command(
+            'run_worker', '--workers', '0', '--once', stdout=io.StringIO()
+        )
+        self.assertTrue(FeedEntry.objects.filter(post=post).exists())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['a@b.c'])
+        post.text = 'Новый текст'
+        post.save()
+        self.assertTrue(Job.objects.filter(
+            name='posts.feed.invalidate', status=Job.QUEUED
+        ).exists())
+
+
+class CommentEmailTests(TestCase):
+    def test_author_gets_email_about_others_comments(self):
+        author = User.objects.create_user(username='shav', email='a@b.c')
+        reader = User.objects.create_user(username='reader')
+        post = Post.objects.create(text='Текст', author=author)
+        Comment.objects.create(post=post, author=author, text='Сам себе')
+        self.assertEqual(mail.outbox, [])
+        Comment.objects.create(post=post, author=reader, text='Привет')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('reader', mail.outbox[0].subject)
+        self.assertIn('Привет', mail.outbox[0].body)
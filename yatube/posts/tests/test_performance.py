@@ -0,0 +1,26 @@
+from django.test import TestCase
+from posts.benchmarks import (load_baselines, regressions, run_views,
+                              seed_dataset)
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = seed_dataset(
+            users=10, groups=2, posts=60, comments=30, follows=3
+        )
+
+    def test_views_fit_query_budget(self):
+        results = run_views(self.reader, repeat=1)
+        self.assertEqual(set(results), set(load_baselines()))
+        failures = regressions(results, load_baselines(), latency=False)
+        self.assertEqual(failures, [])
+
+    def test_regressions_report_budget_and_latency(self):
+        baselines = {'index': {'queries': 3, 'p95_ms': 10.0}}
+        results = {'index': {'queries': 4, 'p50_ms': 9.0, 'p95_ms': 20.0}}
+        self.assertEqual(len(regressions(results, baselines)), 2)
+        self.assertEqual(
+            len(regressions(results, baselines, latency=False)), 1
+        )
@@ -0,0 +1,61 @@
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.profiling import metrics
+from posts.models import Post, User
+
+
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        Post.objects.create(text='Текст', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request_reports_timings(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for part in ('total;dur=', 'sql;dur=', 'tpl;dur=', 'cache;desc='):
+            with self.subTest(part=part):
+                self.assertIn(part, timing)
+        self.assertIn('misses=', timing)
+        self.assertNotIn('desc="0 queries"', timing)
+
+        text = self.staff_client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            text,
+        )
+        self.assertIn('yatube_sql_queries_total{view="posts:index"}', text)
+        self.assertIn('yatube_cache_tier_total{tier="local"', text)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_untouched(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        text = self.staff_client.get(reverse('metrics')).content.decode()
+        self.assertNotIn('posts:index', text)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_need_staff_or_token(self):
+        for headers, status in (
+            ({}, 404),
+            ({'REMOTE_ADDR': '127.0.0.1'}, 404),
+            ({'HTTP_AUTHORIZATION': 'Bearer wrong'}, 404),
+            ({'HTTP_AUTHORIZATION': 'Bearer secret'}, 200),
+        ):
+            with self.subTest(headers=headers):
+                response = self.client.get(reverse('metrics'), **headers)
+                self.assertEqual(response.status_code, status)
+        response = self.staff_client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.querylog import (NPlusOneError, QueryLog, QueryLogMiddleware,
+                           fingerprint)
+from posts.models import Comment, Post, User
+
+
+@override_settings(N_PLUS_ONE_RAISE=True)
+class QueryLogTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            text='Текст', author=User.objects.create_user(username='shav')
+        )
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post,
+                author=User.objects.create_user(username=f'user_{i}'),
+                text='Комментарий',
+            )
+            for i in range(5)
+        )
+
+    def render(self, comments):
+        return render_to_string(
+            'includes/comment_list.html',
+            {'comments': comments, 'post': self.post},
+        )
+
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND x = 'a'"),
+            fingerprint('SELECT * FROM t WHERE id IN (%s) AND x = 5'),
+        )
+
+    def test_n_plus_one_points_at_template_line(self):
+        with self.assertRaises(NPlusOneError) as error:
+            with QueryLog('comments'):
+                self.render(list(Comment.objects.all()))
+        message = str(error.exception)
+        self.assertIn('5 x SELECT', message)
+        self.assertIn('templates/includes/comment_list.html:5', message)
+
+    def test_select_related_passes(self):
+        with QueryLog('comments') as log:
+            self.render(list(Comment.objects.select_related('author')))
+        self.assertEqual(log.n_plus_one(), [])
+
+    @override_settings(SLOW_QUERY_MS=-1)
+    def test_slow_query_is_logged_with_plan(self):
+        with self.assertLogs('core.querylog', 'WARNING') as logs:
+            with QueryLog('slow'):
+                list(Post.objects.filter(author__username='shav'))
+        self.assertIn('posts_post', logs.output[0])
+        self.assertIn('SEARCH', logs.output[0])
+
+    @override_settings(SLOW_QUERY_MS=-1)
+    def test_failed_explain_does_not_fail_query(self):
+        explain = mock.patch.object(
+            QueryLog, 'explain', side_effect=DatabaseError('нет плана')
+        )
+        with explain, self.assertLogs('core.querylog', 'WARNING') as logs:
+            with QueryLog('slow'):
+                posts = list(Post.objects.filter(author__username='shav'))
+        self.assertEqual(posts, [self.post])
+        self.assertIn('План не получен', logs.output[0])
+
+    @override_settings(QUERY_LOG_ENABLED=True)
+    def test_error_page_is_not_reported_as_n_plus_one(self):
+        def view(status):
+            def get_response(request):
+                self.render(list(Comment.objects.all()))
+                return HttpResponse(status=status)
+            return QueryLogMiddleware(get_response)
+
+        request = RequestFactory().get('/')
+        with self.assertRaises(NPlusOneError):
+            view(200)(request)
+        self.assertEqual(view(500)(request).status_code, 500)
@@ -0,0 +1,104 @@
+import io
+from unittest import skipIf
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts import recommendations
+from posts.models import Follow, Recommendation, StaleRecommendations, User
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.first, cls.second, cls.popular, cls.niche = [
+            User.objects.create_user(username=name)
+            for name in ('reader', 'first', 'second', 'popular', 'niche')
+        ]
+        cls.follow(
+            (cls.reader, cls.first),
+            (cls.reader, cls.second),
+            (cls.first, cls.popular),
+            (cls.second, cls.popular),
+            (cls.first, cls.niche),
+            (cls.first, cls.reader),
+            (cls.second, cls.first),
+        )
+
+    @staticmethod
+    def follow(*pairs):
+        Follow.objects.bulk_create(
+            Follow(user=user, author=author) for user, author in pairs
+        )
+
+    def suggested(self, user):
+        return list(
+            Recommendation.objects.filter(user=user).values_list(
+                'author__username', 'score'
+            )
+        )
+
+    def test_friends_of_friends(self):
+        users, rows = recommendations.build(full=True)
+        self.assertEqual(users, 3)
+        # Себя и тех, на кого уже подписан, не советуют; при равном счёте
+        # и числе подписчиков раньше идёт меньший id
+        self.assertEqual(
+            self.suggested(self.reader), [('popular', 2), ('niche', 1)]
+        )
+        self.assertEqual(
+            self.suggested(self.second), [('reader', 1), ('niche', 1)]
+        )
+        self.assertEqual(rows, 5)
+
+    @skipIf(recommendations.numpy is None, 'NumPy не установлен')
+    def test_numpy_graph_matches_python(self):
+        edges = list(Follow.objects.values_list('user_id', 'author_id'))
+        python = recommendations.Graph(edges)
+        vectorized = recommendations.NumpyGraph(edges)
+        self.assertEqual(sorted(python.users()), vectorized.users())
+        for user in User.objects.all():
+            self.assertEqual(
+                python.suggest(user.id, 10), vectorized.suggest(user.id, 10)
+            )
+
+    def test_only_changed_users_are_refreshed(self):
+        recommendations.build(full=True)
+        self.assertFalse(StaleRecommendations.objects.exists())
+        self.assertEqual(recommendations.build(), (0, 0))
+        Follow.objects.create(user=self.second, author=self.niche)
+        self.assertEqual(recommendations.build(), (1, 1))
+        self.assertEqual(self.suggested(self.second), [('reader', 1)])
+        Follow.objects.filter(user=self.reader).delete()
+        recommendations.build()
+        self.assertEqual(self.suggested(self.reader), [])
+
+    def test_follow_removes_suggestion_at_once(self):
+        recommendations.build(full=True)
+        Follow.objects.create(user=self.reader, author=self.popular)
+        self.assertEqual(self.suggested(self.reader), [('niche', 1)])
+
+    def test_deleting_user_with_follows(self):
+        recommendations.build(full=True)
+        self.first.delete()
+        recommendations.build()
+        self.assertEqual(self.suggested(self.reader), [('popular', 1)])
+
+    def test_served_on_feed_with_one_query(self):
+        call_command('build_recommendations', '--full', stdout=io.StringIO())
+        with self.assertNumQueries(1):
+            authors = recommendations.recommendations(self.reader)
+        self.assertEqual(authors, [self.popular, self.niche])
+        cache.clear()
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            response.context['recommendations'], [self.popular, self.niche]
+        )
+        self.assertContains(
+            response,
+            reverse('posts:profile_follow', args=(self.popular.username,)),
+        )
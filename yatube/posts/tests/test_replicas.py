@@ -0,0 +1,127 @@
+import json
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.middleware import ReplicaPinMiddleware
+from core.routers import ReplicaRouter, primary, wrote
+from posts.follows import followed_ids
+from posts.models import Follow, Post, User, UserCounters
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        # Вне запроса записи других тестов закрепили бы чтения за default
+        self.addCleanup(wrote.reset, wrote.set(False))
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def handle(self, request, write=False):
+        used = []
+
+        def get_response(request):
+            if write:
+                self.router.db_for_write(Post)
+            used.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaPinMiddleware(get_response)(request)
+        return used[0], response
+
+    def test_reads_go_to_replica_and_writes_to_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        with primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_is_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_write_pins_user_to_primary(self):
+        database, response = self.handle(self.factory.get('/'))
+        self.assertEqual(database, 'replica')
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+        database, response = self.handle(self.factory.post('/'), write=True)
+        self.assertEqual(database, 'default')
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        request = self.factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = '1'
+        database, _ = self.handle(request)
+        self.assertEqual(database, 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+
+class ReplicaPinViewsTests(TestCase):
+    def test_post_create_sets_pin_cookie(self):
+        user = User.objects.create_user(username='shav')
+        client = Client()
+        client.force_login(user)
+        response = client.get(reverse('posts:index'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        response = client.post(
+            reverse('posts:post_create'), data={'text': 'Текст'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+# Свежие страницы и так читаются из default, здесь проверяется только
+# маршрутизатор
+@mock.patch('posts.caching.recent', lambda versions: False)
+class ReplicaDatabaseTests(TransactionTestCase):
+    """Реплика — отдельная база SQLite, строки в неё переносит
+    replicate(), а до этого она отстаёт от основной."""
+
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def replicate(*models):
+        for model in models:
+            model.objects.using('replica').bulk_create(
+                model.objects.using('default').order_by(),
+                ignore_conflicts=True,
+            )
+
+    def test_writer_reads_own_post_while_replica_lags(self):
+        author = User.objects.create_user(username='shav')
+        self.replicate(User, UserCounters)
+        client = Client()
+        client.force_login(author)
+        response = client.post(
+            reverse('api:post_list'),
+            json.dumps({'text': 'Текст'}),
+            content_type='application/json',
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, client.cookies)
+        url = reverse('api:post_detail', args=(response.json()['id'],))
+        self.assertEqual(client.get(url).status_code, 200)
+        self.assertEqual(Client().get(url).status_code, 404)
+        # Без куки автор тоже читает реплику (страница из кэша не нужна)
+        cache.clear()
+        del client.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(client.get(url).status_code, 404)
+        self.replicate(Post)
+        self.assertEqual(Client().get(url).status_code, 200)
+
+    def test_followed_ids_are_cached_from_primary(self):
+        reader = User.objects.create_user(username='reader')
+        author = User.objects.create_user(username='shav')
+        self.replicate(User, UserCounters)
+        Follow.objects.create(user=reader, author=author)
+        # Чтения вне закреплённого за основной базой запроса
+        self.addCleanup(wrote.reset, wrote.set(False))
+        self.assertFalse(Follow.objects.filter(user=reader).exists())
+        self.assertEqual(followed_ids(reader), {author.id})
@@ -0,0 +1,99 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+from posts.search import FTSBackend
+from posts.tests.test_jobs import immediately
+from posts.utils import write_cursor
+from posts.stemmer import stem
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        cls.book = Post.objects.create(
+            text='Прочитал новую книгу про Ёлки', author=cls.author
+        )
+        cls.books = Post.objects.create(
+            text='Книги, книги и ещё раз книги', author=cls.author
+        )
+        Post.objects.create(text='Совсем о другом', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def search(self, query):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query}
+        )
+        return list(response.context['page_obj'])
+
+    def test_stem(self):
+        for word, expected in (
+            ('книгами', 'книг'),
+            ('важнейшие', 'важн'),
+            ('валялась', 'валя'),
+            ('вдохновенности', 'вдохновен'),
+        ):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), expected)
+
+    def test_search_finds_word_forms_ranked(self):
+        self.assertEqual(self.search('книгами'), [self.books, self.book])
+        self.assertEqual(self.search('елки'), [self.book])
+        self.assertEqual(self.search('абракадабра'), [])
+
+    def test_search_follows_post_changes(self):
+        self.book.text = 'Теперь про фильмы'
+        self.book.save()
+        self.assertEqual(self.search('книга'), [self.books])
+        self.assertEqual(self.search('фильм'), [self.book])
+        self.books.delete()
+        self.assertEqual(self.search('книга'), [])
+
+    @override_settings(JOBS_EAGER=False)
+    @mock.patch('core.jobs.transaction.on_commit', immediately)
+    def test_page_is_refreshed_after_worker_indexes_post(self):
+        self.assertEqual(self.search('фильм'), [])
+        post = Post.objects.create(text='Новый фильм', author=self.author)
+        self.assertEqual(self.search('фильм'), [])
+        call_command(
+            'run_worker', '--workers', '0', '--once', stdout=StringIO()
+        )
+        self.assertEqual(self.search('фильм'), [post])
+
+    def test_cursor_pages(self):
+        backend = FTSBackend()
+        first = backend.page('книга', per_page=1)
+        self.assertEqual(list(first), [self.books])
+        second = backend.page('книга', first.next_cursor, per_page=1)
+        self.assertEqual(list(second), [self.book])
+        self.assertFalse(second.has_next())
+        back = backend.page('книга', second.previous_cursor, per_page=1)
+        self.assertEqual(list(back), [self.books])
+
+    def test_tampered_cursor_returns_first_page(self):
+        first = self.search('книга')
+        for values in (['next', 1.0, 10 ** 30], ['next', 1.0]):
+            cursor = write_cursor(values[0], values[1:])
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse('posts:search'), {'q': 'книга', 'cursor': cursor}
+                )
+                self.assertEqual(list(response.context['page_obj']), first)
+
+    @override_settings(SEARCH_BACKEND='posts.search.LikeBackend')
+    def test_like_backend(self):
+        self.assertEqual(self.search('другом')[0].text, 'Совсем о другом')
+
+    def test_rebuild_command(self):
+        Post.objects.filter(pk=self.book.pk).update(text='Про театр')
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('театр'), [self.book])
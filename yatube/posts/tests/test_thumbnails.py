@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from posts import thumbnails
+from posts.models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEST_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def uploaded(self):
+        return SimpleUploadedFile(
+            name='test.gif', content=TEST_GIF, content_type='image/gif'
+        )
+
+    def test_create_and_edit_schedule_thumbnail(self):
+        with mock.patch.object(thumbnails, 'schedule') as schedule:
+            self.author_client.post(
+                reverse('posts:post_create'),
+                data={'text': 'Текст', 'image': self.uploaded()},
+            )
+            post = Post.objects.get()
+            schedule.assert_called_once_with(post.id)
+            schedule.reset_mock()
+            self.author_client.post(
+                reverse('posts:post_edit', args=(post.id,)),
+                data={'text': 'Новый текст'},
+            )
+            schedule.assert_not_called()
+
+    def test_build_stores_thumbnail_on_post(self):
+        post = Post.objects.create(
+            text='Текст', author=self.author, image=self.uploaded()
+        )
+        thumbnails.build(post.id)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail.name)
+        self.assertEqual(
+            (post.thumbnail_width, post.thumbnail_height), (960, 339)
+        )
+        widths = [
+            int(line.split()[1])
+            for line in post.thumbnail_variants.splitlines()
+        ]
+        self.assertEqual(widths, [320, 640, 960])
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.thumbnail.url)
+        self.assertContains(response, post.thumbnail_srcset)
+        post.image = ''
+        post.save()
+        thumbnails.build(post.id)
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail)
+        self.assertIsNone(post.thumbnail_width)
+
+    def test_changed_image_drops_old_thumbnail(self):
+        post = Post.objects.create(
+            text='Текст', author=self.author, image=self.uploaded()
+        )
+        thumbnails.build(post.id)
+        post.refresh_from_db()
+        old = post.thumbnail.url
+        with mock.patch.object(thumbnails, 'schedule'):
+            self.author_client.post(
+                reverse('posts:post_edit', args=(post.id,)),
+                data={'text': 'Текст', 'image': self.uploaded()},
+            )
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnail)
+        self.assertEqual(post.thumbnail_variants, '')
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, old)
+        self.assertContains(response, post.image.url)
+
+    @override_settings(POST_THUMBNAIL_FORMAT='WEBP')
+    def test_thumbnail_format_is_configurable(self):
+        post = Post.objects.create(
+            text='Текст', author=self.author, image=self.uploaded()
+        )
+        thumbnails.build(post.id)
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnail.name.endswith('.webp'))
+        self.assertIn('.webp 320w', post.thumbnail_srcset)
+
+    def test_srcset_skips_malformed_variant_lines(self):
+        post = Post(
+            thumbnail='thumbs/a.jpg',
+            thumbnail_width=960,
+            thumbnail_height=339,
+            thumbnail_variants='thumbs/a_320.jpg 320\nмусор\n\nthumbs/b.jpg x',
+        )
+        self.assertEqual(
+            post.thumbnail_srcset,
+            f'{post.thumbnail.storage.url("thumbs/a_320.jpg")} 320w',
+        )
+
+    def test_warm_thumbnails_resumes_from_checkpoint(self):
+        posts = [
+            Post.objects.create(
+                text='Текст', author=self.author, image=self.uploaded()
+            )
+            for _ in range(3)
+        ]
+        checkpoint = os.path.join(TEMP_MEDIA_ROOT, 'checkpoint.json')
+        with open(checkpoint, 'w', encoding='utf-8') as file:
+            file.write(f'{{"last_id": {posts[0].id}}}')
+        out = StringIO()
+        call_command(
+            'warm_thumbnails', workers=0, checkpoint=checkpoint, stdout=out
+        )
+        self.assertIn('Готово: 2 постов, ошибок: 0', out.getvalue())
+        self.assertFalse(os.path.exists(checkpoint))
+        thumbs = [
+            bool(post.thumbnail)
+            for post in Post.objects.order_by('id')
+        ]
+        self.assertEqual(thumbs, [False, True, True])
+
+    def test_warm_thumbnails_ignores_checkpoint_of_other_options(self):
+        posts = [
+            Post.objects.create(
+                text='Текст', author=self.author, image=self.uploaded()
+            )
+            for _ in range(2)
+        ]
+        checkpoint = os.path.join(TEMP_MEDIA_ROOT, 'checkpoint.json')
+        with open(checkpoint, 'w', encoding='utf-8') as file:
+            file.write(
+                f'{{"last_id": {posts[0].id}, "since": "2000-01-01", '
+                f'"rebuild": false}}'
+            )
+        out = StringIO()
+        call_command(
+            'warm_thumbnails', workers=0, checkpoint=checkpoint, stdout=out
+        )
+        self.assertIn('Готово: 2 постов, ошибок: 0', out.getvalue())
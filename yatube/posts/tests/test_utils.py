@@ -0,0 +1,98 @@
+import base64
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from posts.models import Post, User
+from posts.utils import CursorPage, CursorPaginator
+
+POST_COUNT = 25
+CL = 10
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='shav')
+        for i in range(POST_COUNT):
+            Post.objects.create(text=f'Text post {i}', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.paginator = CursorPaginator(Post.objects.all(), CL)
+
+    def walk(self):
+        pages = [self.paginator.get_cursor_page()]
+        while pages[-1].has_next():
+            pages.append(
+                self.paginator.get_cursor_page(pages[-1].next_cursor)
+            )
+        return pages
+
+    def test_next_pages_cover_all_posts_in_order(self):
+        pages = self.walk()
+        ids = [post.id for page in pages for post in page]
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(ids, expected)
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_cursor_returns_previous_page(self):
+        first, second, third = self.walk()
+        for page, previous in ((third, second), (second, first)):
+            with self.subTest(page=page):
+                back = self.paginator.get_cursor_page(page.previous_cursor)
+                self.assertEqual(list(back), list(previous))
+                self.assertIsNotNone(back.next_cursor)
+        back = self.paginator.get_cursor_page(second.previous_cursor)
+        self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        first = self.paginator.get_cursor_page()
+        for cursor in ('broken', 'W10=', 'WyJ1cCJd'):
+            with self.subTest(cursor=cursor):
+                page = self.paginator.get_cursor_page(cursor)
+                self.assertEqual(list(page), list(first))
+
+    def test_tampered_cursor_returns_first_page(self):
+        first = self.paginator.get_cursor_page()
+        for values in (
+            ['next', 'abc', '1'],
+            ['next', None, None],
+            ['next', '2020-01-01T00:00:00+00:00', str(10 ** 30)],
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(values).encode()
+            ).decode()
+            with self.subTest(values=values):
+                page = self.paginator.get_cursor_page(cursor)
+                self.assertEqual(list(page), list(first))
+                response = self.client.get(
+                    reverse('posts:index') + f'?cursor={cursor}'
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_view_uses_cursor(self):
+        response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj, CursorPage)
+        response = self.client.get(
+            reverse('posts:index') + f'?cursor={page_obj.next_cursor}'
+        )
+        self.assertEqual(
+            response.context['page_obj'][0].id,
+            Post.objects.order_by('-pub_date', '-id')[CL].id,
+        )
+
+    @override_settings(PAGINATION_MODE='offset')
+    def test_view_offset_mode(self):
+        response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertNotIsInstance(page_obj, CursorPage)
+        self.assertEqual(page_obj.paginator.num_pages, 3)
@@ -54,6 +54,7 @@ class PostsURLTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
         
     def setUp(self):
+        cache.clear()
         self.author_client = Client()
         self.author_client.force_login(self.author)
         self.templates_url_names = (
@@ -141,19 +142,58 @@ class PostsTests(TestCase):
                 author=cls.author,
             )
 
+    def setUp(self):
+        cache.clear()
+
     def test_cache(self):
         post = Post.objects.create(
             text='8'*8,
             author=self.author,
         )
         response1 = self.client.get(reverse('posts:index'))
-        post.delete()
         response2 = self.client.get(reverse('posts:index'))
         self.assertEqual(response1.content, response2.content)
-        cache.clear()
+        self.assertIsNone(response2.context)
+        post.delete()
         response3 = self.client.get(reverse('posts:index'))
         self.assertNotEqual(response1.content, response3.content)
 
+    def test_cache_key_includes_page_and_user(self):
+        response1 = self.client.get(reverse('posts:index'))
+        response2 = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertNotEqual(response1.content, response2.content)
+        author_client = Client()
+        author_client.force_login(self.author)
+        response3 = author_client.get(reverse('posts:index'))
+        self.assertIsNotNone(response3.context)
+        self.assertContains(response3, self.author.username)
+
+    def test_comment_and_follow_invalidate_cache(self):
+        user = User.objects.create_user(username='mav')
+        user_client = Client()
+        user_client.force_login(user)
+        detail = reverse('posts:post_detail', args=(self.post.id,))
+        profile = reverse('posts:profile', args=(self.author.username,))
+        for url in (detail, profile):
+            user_client.get(url)
+            user_client.get(url)
+            self.assertIsNone(user_client.get(url).context)
+        Comment.objects.create(post=self.post, author=user, text='коммент')
+        self.assertContains(user_client.get(detail), 'коммент')
+        user_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertContains(user_client.get(profile), 'Отписаться')
+
+    def test_group_slug_change_invalidates_old_page(self):
+        group = Group.objects.create(title='Группа 2', slug='group2')
+        old = reverse('posts:group_posts', args=(group.slug,))
+        self.client.get(old)
+        self.assertIsNone(self.client.get(old).context)
+        group.slug = 'renamed'
+        group.save()
+        self.assertEqual(self.client.get(old).status_code, 404)
+
     def test_paginator(self):
         tuple = (('?page=1', 10), ('?page=2', 4))
         def func(self, page, count):
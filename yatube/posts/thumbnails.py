@@ -0,0 +1,71 @@
+from django.conf import settings
+from sorl.thumbnail import delete, get_thumbnail
+
+from core import jobs
+
+from .models import Post
+from .signals import invalidate_post
+
+
+def geometries():
+    """Размеры копий миниатюры по POST_THUMBNAIL_WIDTHS с пропорцией
+    POST_THUMBNAIL_GEOMETRY."""
+    width, height = map(int, settings.POST_THUMBNAIL_GEOMETRY.split('x'))
+    return [
+        f'{size}x{round(height * size / width)}'
+        for size in sorted(settings.POST_THUMBNAIL_WIDTHS)
+    ]
+
+
+def make(image, geometry):
+    return get_thumbnail(
+        image,
+        geometry,
+        format=settings.POST_THUMBNAIL_FORMAT,
+        quality=settings.POST_THUMBNAIL_QUALITY,
+        **settings.POST_THUMBNAIL_OPTIONS,
+    )
+
+
+def build(post_id, rebuild=False):
+    """Строит миниатюру поста и её копии и запоминает их в строке поста.
+
+    rebuild сбрасывает уже известные sorl миниатюры картинки, например
+    после восстановления media/ из резервной копии.
+    """
+    post = Post.objects.select_related('author').filter(pk=post_id).first()
+    if post is None:
+        return
+    fields = {'thumbnail': '', 'thumbnail_width': None,
+              'thumbnail_height': None, 'thumbnail_variants': ''}
+    if post.image and rebuild:
+        delete(post.image, delete_file=False)
+    if post.image:
+        thumb = make(post.image, settings.POST_THUMBNAIL_GEOMETRY)
+        variants = [make(post.image, geometry) for geometry in geometries()]
+        fields = {
+            'thumbnail': thumb.name,
+            'thumbnail_width': thumb.width,
+            'thumbnail_height': thumb.height,
+            'thumbnail_variants': '\n'.join(
+                f'{variant.name} {variant.width}' for variant in variants
+            ),
+        }
+    Post.objects.filter(pk=post_id).update(**fields)
+    invalidate_post(post, post.group_id)
+
+
+def forget(post):
+    """Убирает с поста миниатюру прежней картинки перед сохранением.
+
+    Пока новая не построена, шаблон покажет саму картинку.
+    """
+    post.thumbnail = ''
+    post.thumbnail_width = post.thumbnail_height = None
+    post.thumbnail_variants = ''
+
+
+def schedule(post_id):
+    """Ставит построение миниатюры в фоновую очередь после фиксации
+    транзакции."""
+    jobs.enqueue(build, post_id)
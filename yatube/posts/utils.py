@@ -1,9 +1,184 @@
-from django.core.paginator import Paginator
+import base64
+import json
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from yatube.settings import COMMENTS_LENGTH, FOLLOWS_LENGTH
 from yatube.settings import CUT_LENGTH as CL
 
 
-def func_paginator(request, pag):
-    paginator = Paginator(pag, CL)
+# Целые за пределами 64 бит SQLite не принимает и роняет запрос
+INTEGER_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def write_cursor(direction, values):
+    raw = json.dumps([direction] + list(values)).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def read_cursor(cursor, converters):
+    """Направление и значения курсора или (None, None), если он негоден.
+
+    Курсор приходит от клиента: чужой или подделанный не должен ронять
+    страницу, с ним показывается первая. converters приводят значения
+    к типам полей сортировки, по одному на поле.
+    """
+    try:
+        direction, *values = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+        values = [
+            convert(value) for convert, value in zip(converters, values)
+        ]
+    except (TypeError, ValueError, ValidationError):
+        return None, None
+    if direction not in ('next', 'prev') or len(values) != len(converters):
+        return None, None
+    for value in values:
+        if value is None or (
+            isinstance(value, int) and value not in INTEGER_RANGE
+        ):
+            return None, None
+    return direction, values
+
+
+class CursorPage(Page):
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CountedPaginator(Paginator):
+    """Paginator, которому можно передать готовое число объектов."""
+
+    def __init__(self, object_list, per_page, count=None):
+        super().__init__(object_list, per_page)
+        if count is not None:
+            self.count = count
+
+
+class CursorPaginator(CountedPaginator):
+    """Постраничный вывод по ключу (keyset) вместо OFFSET.
+
+    Страница выбирается условием по полям сортировки относительно
+    последней показанной записи, поэтому её стоимость не зависит от
+    глубины, а COUNT(*) не выполняется.
+    """
+
+    def __init__(
+        self, object_list, per_page, ordering=('-pub_date', '-id'), count=None
+    ):
+        super().__init__(object_list, per_page, count)
+        self.ordering = ordering
+        self.fields = [name.lstrip('-') for name in ordering]
+
+    def encode_cursor(self, obj, direction):
+        return write_cursor(
+            direction, [self._value(obj, name) for name in self.fields]
+        )
+
+    def decode_cursor(self, cursor):
+        return read_cursor(
+            cursor, [self._field(name).to_python for name in self.fields]
+        )
+
+    def get_cursor_page(self, cursor=None):
+        direction, values = None, None
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        backward = direction == 'prev'
+        ordering = self.ordering
+        if backward:
+            ordering = [self._reverse(name) for name in ordering]
+        queryset = self.object_list.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._seek(ordering, values))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backward:
+            rows.reverse()
+        has_next = has_more or backward
+        has_previous = has_more if backward else values is not None
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor(rows[-1], 'next')
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor(rows[0], 'prev')
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    def _field(self, name):
+        return self.object_list.model._meta.get_field(name)
+
+    def _value(self, obj, name):
+        field = self._field(name)
+        # Строки из values() приходят словарями
+        if isinstance(obj, dict):
+            obj = self.object_list.model(**{field.attname: obj[name]})
+        return field.value_to_string(obj)
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    def _seek(self, ordering, values):
+        condition = Q()
+        for index, name in enumerate(ordering):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            step = Q(**{f'{name.lstrip("-")}__{lookup}': values[index]})
+            for prev_name, prev_value in zip(self.fields[:index], values):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+        # Нестрогая граница по первому полю позволяет базе начать чтение
+        # индекса сразу с нужного места, а не фильтровать его с начала
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': values[0]}) & condition
+
+
+def func_paginator(request, pag, count=None):
+    """Страница постов; count — готовое число постов или функция, которая
+    его вернёт, если оно понадобится."""
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if settings.PAGINATION_MODE == 'offset' or page_number is not None:
+        if callable(count):
+            count = count()
+        paginator = CountedPaginator(pag, CL, count)
+        return paginator.get_page(page_number)
+    paginator = CursorPaginator(
+        pag, CL, count=None if callable(count) else count
+    )
+    return paginator.get_cursor_page(request.GET.get('cursor'))
+
+
+def comments_paginator(request, post):
+    paginator = CursorPaginator(
+        post.comments.select_related('author'),
+        COMMENTS_LENGTH,
+        ordering=('created', 'id'),
+        count=post.comments_count,
+    )
+    return paginator.get_cursor_page(request.GET.get('cursor'))
+
+
+def follows_paginator(request, follows, count):
+    """Подписки от новых к старым, постранично по id.
+
+    Выборка подписчиков или подписок одного пользователя идёт по индексу
+    внешнего ключа, в котором записи уже упорядочены по id, поэтому
+    дальняя страница стоит столько же, сколько первая.
+    """
+    paginator = CursorPaginator(
+        follows, FOLLOWS_LENGTH, ordering=('-id',), count=count
+    )
+    return paginator.get_cursor_page(request.GET.get('cursor'))
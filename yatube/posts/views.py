@@ -1,25 +1,64 @@
+from urllib.parse import urlencode
+
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.cache import cache_page
 
+from . import thumbnails
+from .caching import cached_view
+from .counters import counters_of, posts_total, user_counters
+from .feed import feed_posts, feed_queryset
+from .follows import is_following
 from .forms import CommentForm, PostForm
 from .models import Comment, Follow, Group, Post, User
-from .utils import func_paginator
+from .recommendations import recommendations
+from .search import get_backend
+from .utils import comments_paginator, follows_paginator, func_paginator
+
+# Чьи подписки выбираются, кто показывается в списке и его счётчик
+FOLLOW_LISTS = {
+    'followers': ('author', 'user', 'followers_count'),
+    'following': ('user', 'author', 'following_count'),
+}
+
+
+def post_author_scope(request, post_id):
+    username = Post.objects.filter(pk=post_id).values_list(
+        'author__username', flat=True
+    ).first()
+    return f'author:{username}'
 
 
+@cached_view('posts')
 def index(request):
     posts_list = Post.objects.select_related('group', 'author').all()
-    page_obj = func_paginator(request, posts_list)
+    page_obj = func_paginator(request, posts_list, posts_total)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@cached_view('posts')
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = None
+    if query:
+        page_obj = get_backend().page(query, request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_params': urlencode({'q': query}),
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@cached_view('group:{slug}')
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     posts_list = group.posts.select_related('author').all()
-    page_obj = func_paginator(request, posts_list)
+    page_obj = func_paginator(request, posts_list, group.posts_count)
     context = {
         'page_obj': page_obj,
         'group': group,
@@ -27,32 +66,91 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cached_view('author:{username}')
 def profile(request, username):
-    person = get_object_or_404(User, username=username)
-    following = False
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=person,
-        ).exists()
+    person = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    counters = counters_of(person)
     posts = person.posts.select_related('group').all()
-    page_obj = func_paginator(request, posts)
+    page_obj = func_paginator(request, posts, counters.posts_count)
     context = {
         'page_obj': page_obj,
         'author': person,
-        'following' : following
+        'counters': counters,
+        'following' : is_following(request.user, [person.id])[person.id]
     }
     return render(request, 'posts/profile.html', context)
 
 
+def follow_list(request, username, kind):
+    person = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    counters = counters_of(person)
+    owner, side, count = FOLLOW_LISTS[kind]
+    follows = Follow.objects.filter(**{owner: person}).select_related(side)
+    page_obj = follows_paginator(request, follows, getattr(counters, count))
+    context = {
+        'page_obj': page_obj,
+        'people': [getattr(follow, side) for follow in page_obj],
+        'author': person,
+        'counters': counters,
+        'kind': kind,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+# Кнопки подписки в списке зависят от подписок того, кто его смотрит
+@cached_view('author:{username}', 'follows:{user.id}')
+def followers(request, username):
+    return follow_list(request, username, 'followers')
+
+
+@cached_view('author:{username}', 'follows:{user.id}')
+def following(request, username):
+    return follow_list(request, username, 'following')
+
+
+@cached_view('post:{post_id}', post_author_scope)
 def post_detail(request, post_id):
-    post = Post.objects.select_related('author', 'group').get(id=post_id)
-    comments = post.comments.all()
+    post = Post.objects.select_related(
+        'author__counters', 'group'
+    ).get(id=post_id)
+    comments = comments_paginator(request, post)
     form = CommentForm()
-    context = {'post': post, 'form': form, 'comments': comments}
+    context = {
+        'post': post,
+        'form': form,
+        'comments': comments,
+        'author_counters': counters_of(post.author),
+    }
     return render(request, 'posts/post_detail.html', context)
 
 
+@cached_view('post:{post_id}')
+def post_comments(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author'), id=post_id
+    )
+    comments = comments_paginator(request, post)
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created,
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+    context = {'post': post, 'comments': comments}
+    return render(request, 'includes/comment_list.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(
@@ -64,6 +162,8 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    if post.image:
+        thumbnails.schedule(post.id)
     return redirect('posts:profile', request.user.username)
 
 
@@ -79,7 +179,11 @@ def post_edit(request, post_id):
     )
     if not form.is_valid():
         return render(request, 'posts/create_post.html', {'form': form})
+    if 'image' in form.changed_data:
+        thumbnails.forget(post)
     form.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post.id)
     return redirect('posts:post_detail', post.id)
 
 
@@ -117,7 +221,6 @@ def comment_delete(request, comment_id):
 def comment_edit(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
     post = comment.post
-    comments = post.comments.select_related('author').all()
     if comment.author != request.user:
         return redirect('posts:post_detail', post_id=comment.post.id)
     form = CommentForm(
@@ -125,20 +228,28 @@ def comment_edit(request, comment_id):
         instance=comment,
     )
     if not form.is_valid():
-        context = {'post': post, 'form': form, 'comments': comments}
+        context = {
+            'post': post,
+            'form': form,
+            'comments': comments_paginator(request, post),
+            'author_counters': user_counters(post.author_id),
+        }
         return render(request, 'posts/post_detail.html', context)
     form.save()
     return redirect('posts:post_detail', post_id=comment.post.id)
 
 
 @login_required
+@cached_view('feed:{user.id}', 'feed:hot')
 def follow_index(request):
-    posts_list = Post.objects.select_related(
-        'author', 'group'
-    ).filter(author__following__user=request.user)
-    page_obj = func_paginator(request, posts_list)
+    # Длина ленты не хранится: записи раскладываются в фоне, а посты
+    # «горячих» авторов дочитываются при запросе. Постраничный вывод
+    # по курсору её и не считает
+    page_obj = func_paginator(request, feed_queryset(request.user))
+    page_obj.object_list = feed_posts(page_obj.object_list)
     context = {
         'page_obj': page_obj,
+        'recommendations': recommendations(request.user),
     }
     return render(request, 'posts/follow.html', context)
 
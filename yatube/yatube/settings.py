@@ -24,6 +24,24 @@ ALLOWED_HOSTS = [
 
 CUT_LENGTH = 10
 
+COMMENTS_LENGTH = 20
+
+FOLLOWS_LENGTH = 30
+
+# 'cursor' — постраничный вывод по ключу, 'offset' — классический Paginator
+PAGINATION_MODE = 'cursor'
+
+# Поиск по постам: posts.search.FTSBackend — индекс SQLite FTS5,
+# posts.search.LikeBackend — подстрока через LIKE без индекса
+SEARCH_BACKEND = 'posts.search.FTSBackend'
+
+# Посты авторов, у которых подписчиков больше этого числа, не раскладываются
+# по лентам при публикации, а дочитываются при открытии ленты
+FEED_FANOUT_LIMIT = 1000
+
+# Сколько последних постов автора попадает в ленту при подписке
+FEED_BACKFILL_LENGTH = 200
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -50,11 +68,15 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
+    'core.querylog.QueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -87,6 +109,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Потоки, в которых yatube.asgi выполняет представления
+ASGI_THREADS = 8
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -95,9 +120,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Прагмы, которые core.sqlite выполняет на каждом новом соединении с SQLite.
+# В режиме WAL читатели не блокируют писателя, а писатели при блокировке
+# ждут busy_timeout миллисекунд вместо немедленной ошибки.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения. Локально это может быть копия базы:
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+#     'CONN_MAX_AGE': 60,
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает из основной базы
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'pin_primary'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -142,10 +195,76 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Общий для всех процессов кэш лежит в файлах, перед ним — небольшой кэш
+# в памяти процесса для страниц (см. core.cache.TieredCache). Вместо
+# файлов здесь может быть Memcached или Redis с тем же псевдонимом.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.TieredCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_PREFIXES': ['page:'],
+            'LOCAL_TIMEOUT': 5,
+            'LOCAL_MAX_ENTRIES': 300,
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, '.cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
 }
 
+# Миниатюра картинки поста, которая строится в фоне после сохранения,
+# и её уменьшенные копии той же пропорции для srcset
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_THUMBNAIL_WIDTHS = (320, 640, 960)
+POST_THUMBNAIL_FORMAT = 'JPEG'
+POST_THUMBNAIL_QUALITY = 75
+POST_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+# Доля запросов, для которых core.profiling замеряет SQL, шаблоны и кэш
+PROFILING_SAMPLE_RATE = 0.1
+
+# Журнал медленных запросов и поиск N+1 (core.querylog), включён при
+# разработке. Тесты запускаются с ним и с N_PLUS_ONE_RAISE = True и
+# падают на N+1.
+QUERY_LOG_ENABLED = DEBUG
+SLOW_QUERY_MS = 100
+N_PLUS_ONE_THRESHOLD = 5
+N_PLUS_ONE_RAISE = False
+TEST_RUNNER = 'core.testing.QueryLogTestRunner'
+
+# Сводка /metrics/ доступна сотрудникам и сборщику метрик, который
+# передаёт заголовок Authorization: Bearer <METRICS_TOKEN>. Без токена
+# в окружении — только сотрудникам.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+# Страницы лежат в кэше до изменения данных, этот срок — страховка
+PAGE_CACHE_TIMEOUT = 60 * 15
+
+# Подписки пользователя (posts.follows) сбрасываются при изменении,
+# этот срок — тоже страховка
+FOLLOWS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Рекомендации подписок (posts.recommendations): сколько авторов
+# хранится для каждого пользователя и сколько показывается в ленте
+RECOMMENDATIONS_LIMIT = 20
+RECOMMENDATIONS_SHOWN = 5
+
+# Фоновая очередь core.jobs: задачи выполняет manage.py run_worker.
+# Упавшая задача повторяется через JOBS_RETRY_DELAY секунд, пауза
+# удваивается до JOBS_RETRY_MAX_DELAY. При JOBS_EAGER задачи выполняются
+# сразу при постановке, так запускаются тесты.
+JOBS_EAGER = False
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 60 * 60
+JOBS_LEASE_SECONDS = 5 * 60
+JOBS_KEEP_DONE_SECONDS = 24 * 60 * 60
+
+# Размер страницы списков API по умолчанию и предел для ?limit=
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'